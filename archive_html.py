@@ -0,0 +1,533 @@
+"""Streaming HTML rendering for zenodo_archive.html.
+
+The page is written piece by piece from a generator instead of being built as
+one string: ``iter_page`` yields the head, one chunk per table row, the
+modals and the footer, and ``write_page`` copies those chunks into a buffered
+file that replaces the output atomically. Memory use stays flat in the number
+of rows. Row and modal markup come from the module-level templates below,
+whose ``format_map`` methods are bound once at import.
+
+``write_page_incremental`` writes the same page from a build manifest
+(``<page>_manifest.json``): only rows added or changed since the last build
+are rendered, every other row is copied from its cached fragments.
+
+``write_json_page`` is the lighter alternative: an empty table that DataTables
+fills from a JSON payload, with a single citation modal.
+"""
+import hashlib
+import html
+import json
+import os
+
+PAGE_HEAD = """
+<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>The Sarvāmnāya Oral Tradition Archive</title>
+    <link rel="stylesheet" href="https://cdn.jsdelivr.net/npm/bootstrap@4.5.3/dist/css/bootstrap.min.css">
+    <link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/5.15.4/css/all.min.css">
+    <style>
+        body {
+            font-family: 'Georgia', serif;
+            background-color: #fdf6e3;
+            color: #3e3e3e;
+            padding: 30px;
+            font-size: 0.8em;
+        }
+        h1 {
+            font-size: 2em;
+            text-align: center;
+            margin-bottom: 10px;
+        }
+        .subtitle {
+            text-align: center;
+            font-size: 1.2em;
+            margin-bottom: 30px;
+        }
+        .logo {
+            display: block;
+            margin: 0 auto 20px auto;
+            max-width: 200px;
+        }
+        .table-responsive {
+            margin-top: 30px;
+        }
+        .table th, .table td {
+            text-align: center;
+        }
+        .table th {
+            background-color: #343a40;
+            color: white;
+        }
+        .table td {
+            vertical-align: middle;
+        }
+        .modal-body pre {
+            font-family: monospace;
+            white-space: pre-wrap;
+            background-color: #f8f9fa;
+            padding: 10px;
+            border-radius: 5px;
+        }
+        .modal-header {
+            background-color: #007bff;
+            color: white;
+        }
+        .modal-footer {
+            border-top: none;
+        }
+        .copy-btn {
+            background-color: #007bff;
+            color: white;
+            border: none;
+            padding: 5px 10px;
+            cursor: pointer;
+        }
+        .copy-btn:hover {
+            background-color: #0056b3;
+        }
+    </style>
+    <link href="https://cdn.datatables.net/1.10.21/css/jquery.dataTables.min.css" rel="stylesheet">
+</head>
+<body>
+    <img class="logo" src="https://static.wixstatic.com/media/6877d8_58c2bf304142418baeaf28fdc42f9dc6~mv2.png/v1/fill/w_357,h_418,al_c,lg_1,q_85,enc_avif,quality_auto/Logo%20transparent.png" alt="Vimarsha Foundation Logo">
+    <h1>The Sarvāmnāya Oral Tradition Archive</h1>
+    <p class="subtitle">A project of <a href="https://www.vimarshafoundation.org/">Vimarsha Foundation</a></p>
+"""
+
+TABLE_HEAD = """
+    <div class="table-responsive">
+        <table class="table table-bordered table-hover" id="archiveTable">
+            <thead class="thead-dark">
+                <tr>
+                    <th>Title</th>
+                    <th>DOI</th>
+                    <th>Cite</th>
+                    <th>Zenodo Id</th>
+                    <th>YouTube Id</th> 
+                </tr>
+            </thead>
+            <tbody>
+"""
+
+HTML_HEAD = PAGE_HEAD + TABLE_HEAD
+
+TABLE_END = """
+    </tbody>
+</table>
+</div>
+"""
+
+HTML_FOOTER = """
+<!-- Modals -->
+<div id="modalsContainer"></div>
+
+<script src="https://code.jquery.com/jquery-3.5.1.slim.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/bootstrap@4.5.3/dist/js/bootstrap.bundle.min.js"></script>
+<script src="https://cdn.datatables.net/1.10.21/js/jquery.dataTables.min.js"></script>
+<script>
+    $(document).ready(function() {
+        $('#archiveTable').DataTable({
+            "paging": true,
+            "searching": true,
+            "ordering": true
+        });
+    });
+</script>
+</body>
+</html>
+"""
+
+ROW_TEMPLATE = """
+    <tr>
+        <td>{title}</td>
+        <td><a href="{doi_link}" target="_blank">{doi}</a></td>
+        <td><a href="#" class="citation-btn" data-toggle="modal" data-target="#{modal_id}">Cite</a></td>
+        <td><a href="{zenodo_link}" target="_blank">{zenodo_id}</a></td>
+        <td><a href="{youtube_link}" target="_blank">{youtube_id}</a></td>
+    </tr>
+"""
+
+MODAL_TEMPLATE = """
+    <div class="modal fade" id="{modal_id}" tabindex="-1" role="dialog" aria-labelledby="{modal_id}Label" aria-hidden="true">
+      <div class="modal-dialog modal-lg" role="document">
+        <div class="modal-content">
+          <div class="modal-header">
+            <h5 class="modal-title" id="{modal_id}Label">{title}</h5>
+            <button type="button" class="close" data-dismiss="modal" aria-label="Close">
+              <span aria-hidden="true">&times;</span>
+            </button>
+          </div>
+          <div class="modal-body">
+            <strong>BibTeX:</strong><br>
+            <pre>{bibtex}</pre>
+          </div>
+        </div>
+      </div>
+    </div>
+"""
+
+_render_row = ROW_TEMPLATE.format_map
+_render_modal = MODAL_TEMPLATE.format_map
+WRITE_BUFFER_SIZE = 1 << 16
+
+
+def row_fields(row):
+    """Escaped template fields for one registry row."""
+    doi = html.escape(row["doi"])
+    return {
+        "title": html.escape(row["title"]),
+        "doi": doi,
+        "doi_link": f"https://doi.org/{doi}",
+        "modal_id": f"citationModal{row['zenodo_id']}",
+        "zenodo_id": row["zenodo_id"],
+        "zenodo_link": html.escape(row["zenodo_link"]),
+        "youtube_id": html.escape(row["youtube_id"]),
+        "youtube_link": html.escape(row["youtube_link"]),
+    }
+
+
+def render_row(row):
+    return _render_row(row_fields(row))
+
+
+def render_modal(row, bibtex):
+    fields = row_fields(row)
+    fields["bibtex"] = html.escape(bibtex)
+    return _render_modal(fields)
+
+
+def iter_page(rows, get_bibtex):
+    """Yield the page in order. ``rows`` is iterated twice (table, then modals)."""
+    yield HTML_HEAD
+    for row in rows:
+        yield render_row(row)
+    yield TABLE_END
+    for row in rows:
+        yield render_modal(row, get_bibtex(row["zenodo_id"]) or "Unavailable")
+    yield HTML_FOOTER
+
+
+def write_page(path, rows, get_bibtex):
+    """Stream the page to ``path`` through a temp file, then swap it in."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
+        for chunk in iter_page(rows, get_bibtex):
+            file.write(chunk)
+    os.replace(tmp_path, path)
+
+
+# ------------------------- INCREMENTAL BUILDS -------------------------
+# The manifest keeps, per zenodo_id, a hash of the row's registry fields and
+# the byte ranges of its row and modal in the page it last built. A rebuild
+# renders only new or changed rows (and rows whose BibTeX was refreshed or
+# missing); every other fragment is copied from the previous page, consecutive
+# ranges in one read.
+
+ROW_KEYS = ("title", "doi", "zenodo_id", "zenodo_link", "youtube_id", "youtube_link")
+TEMPLATES_DIGEST = hashlib.sha1((HTML_HEAD + ROW_TEMPLATE + TABLE_END + MODAL_TEMPLATE).encode("utf-8")).hexdigest()
+COPY_CHUNK_SIZE = 1 << 20
+
+_row_key = "\x1f".join("{%s}" % key for key in ROW_KEYS).format_map
+
+
+def manifest_path_for(path):
+    return f"{os.path.splitext(path)[0]}_manifest.json"
+
+
+def row_digest(row):
+    """Hash of the registry fields a row's fragments are rendered from."""
+    return hashlib.sha1(_row_key(row).encode("utf-8")).hexdigest()[:16]
+
+
+class BuildManifest:
+    """Row hashes and fragment offsets of the last build of a page.
+
+    Each entry is ``[row_hash, cited, row_start, row_end, modal_start,
+    modal_end]``, where ``cited`` is 0 if the modal was rendered without
+    BibTeX. The manifest is only trusted while the page it describes is
+    unchanged on disk (same size and mtime).
+    """
+
+    def __init__(self, path, reuse=True):
+        self.path = path
+        self.entries = {}
+        self.page = None
+        self.removed = 0
+        if reuse and os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                manifest = json.load(file)
+            # Offsets into another page, or fragments from other templates, are useless
+            stamp = self._page_stamp(manifest.get("page"))
+            if manifest.get("templates") == TEMPLATES_DIGEST and stamp and stamp == manifest.get("stamp"):
+                self.page = manifest["page"]
+                self.entries = manifest["rows"]
+
+    @staticmethod
+    def _page_stamp(page):
+        if not page or not os.path.exists(page):
+            return None
+        stat = os.stat(page)
+        return [stat.st_size, stat.st_mtime_ns]
+
+    def changed_rows(self, rows):
+        """Rows that were built before but whose registry fields changed since."""
+        changed = []
+        for row in rows:
+            entry = self.entries.get(str(row["zenodo_id"]))
+            if entry is not None and entry[0] != row_digest(row):
+                changed.append(row)
+        return changed
+
+    def build(self, path, rows, get_bibtex, refresh=()):
+        """Write the page to ``path``, rendering only rows that are new, changed or in ``refresh``.
+
+        ``refresh`` holds the zenodo_ids whose BibTeX changed since the last
+        build. Returns ``{"rows", "rendered", "reused", "removed"}``.
+        """
+        refresh = {str(zenodo_id) for zenodo_id in refresh}
+        keys = []
+        row_parts = []  # per row: rendered bytes, or the (start, end) range in the old page
+        modal_parts = []
+        rendered = 0
+        entries = {}
+        for row in rows:
+            key = str(row["zenodo_id"])
+            row_hash = row_digest(row)
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != row_hash or not entry[1] or key in refresh:
+                bibtex = get_bibtex(row["zenodo_id"])
+                row_parts.append(render_row(row).encode("utf-8"))
+                modal_parts.append(render_modal(row, bibtex or "Unavailable").encode("utf-8"))
+                entries[key] = [row_hash, int(bibtex is not None)]
+                rendered += 1
+            else:
+                row_parts.append((entry[2], entry[3]))
+                modal_parts.append((entry[4], entry[5]))
+                entries[key] = entry[:2]
+            keys.append(key)
+
+        position = len(HTML_HEAD.encode("utf-8"))
+        for parts, gap in ((row_parts, TABLE_END), (modal_parts, HTML_FOOTER)):
+            for key, part in zip(keys, parts):
+                size = len(part) if isinstance(part, bytes) else part[1] - part[0]
+                entries[key] += [position, position + size]
+                position += size
+            position += len(gap.encode("utf-8"))
+
+        self.removed = len(set(self.entries) - set(entries))
+        result = {"rows": len(keys), "rendered": rendered, "reused": len(keys) - rendered, "removed": self.removed}
+        if entries == self.entries and self.page == path:
+            return result  # Same rows, same order, nothing rendered: the page is already up to date
+
+        tmp_path = f"{path}.tmp"
+        old = open(self.page, "rb") if rendered < len(keys) else None
+        try:
+            with open(tmp_path, "wb", buffering=WRITE_BUFFER_SIZE) as out:
+                out.write(HTML_HEAD.encode("utf-8"))
+                _write_parts(out, old, row_parts)
+                out.write(TABLE_END.encode("utf-8"))
+                _write_parts(out, old, modal_parts)
+                out.write(HTML_FOOTER.encode("utf-8"))
+        finally:
+            if old:
+                old.close()
+        os.replace(tmp_path, path)
+
+        self.entries = entries
+        self.page = path
+        self.save()
+        return result
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            # json.dumps takes the C encoder; json.dump to a file does not
+            file.write(json.dumps({"templates": TEMPLATES_DIGEST, "page": self.page,
+                                   "stamp": self._page_stamp(self.page), "rows": self.entries},
+                                  separators=(",", ":")))
+        os.replace(tmp_path, self.path)
+
+
+def _write_parts(out, old, parts):
+    """Write rendered fragments as they are and copy old-page ranges, merging adjacent ranges."""
+    run = None
+
+    def flush():
+        old.seek(run[0])
+        remaining = run[1] - run[0]
+        while remaining:
+            chunk = old.read(min(remaining, COPY_CHUNK_SIZE))
+            out.write(chunk)
+            remaining -= len(chunk)
+
+    for part in parts:
+        if isinstance(part, bytes):
+            if run:
+                flush()
+                run = None
+            out.write(part)
+        elif run and part[0] == run[1]:
+            run[1] = part[1]
+        else:
+            if run:
+                flush()
+            run = list(part)
+    if run:
+        flush()
+
+
+def write_page_incremental(path, rows, get_bibtex, manifest=None, refresh=()):
+    """Like ``write_page``, but reuse the unchanged fragments of the last build.
+
+    Returns ``{"rows", "rendered", "reused", "removed"}``.
+    """
+    manifest = manifest or BuildManifest(manifest_path_for(path))
+    return manifest.build(path, rows, get_bibtex, refresh)
+
+
+# ------------------------- JSON PAYLOAD MODE -------------------------
+# One shared citation modal and a compact row payload that DataTables renders
+# client-side with deferRender. BibTeX lives in a sidecar file that is only
+# downloaded when "Cite" is clicked for the first time.
+
+JSON_PAGE_FOOTER = """
+<div class="modal fade" id="citationModal" tabindex="-1" role="dialog" aria-labelledby="citationModalLabel" aria-hidden="true">
+  <div class="modal-dialog modal-lg" role="document">
+    <div class="modal-content">
+      <div class="modal-header">
+        <h5 class="modal-title" id="citationModalLabel"></h5>
+        <button type="button" class="close" data-dismiss="modal" aria-label="Close">
+          <span aria-hidden="true">&times;</span>
+        </button>
+      </div>
+      <div class="modal-body">
+        <strong>BibTeX:</strong><br>
+        <pre id="citationBibtex"></pre>
+      </div>
+    </div>
+  </div>
+</div>
+
+<script src="https://code.jquery.com/jquery-3.5.1.slim.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/bootstrap@4.5.3/dist/js/bootstrap.bundle.min.js"></script>
+<script src="https://cdn.datatables.net/1.10.21/js/jquery.dataTables.min.js"></script>
+{data_script}
+<script>
+    function escapeHtml(value) {{
+        return $('<div>').text(String(value)).html();
+    }}
+
+    var bibtexPromise = null;
+    function loadBibtex() {{
+        if (!bibtexPromise) {{
+            bibtexPromise = fetch({bibtex_url}).then(function(r) {{ return r.json(); }});
+        }}
+        return bibtexPromise;
+    }}
+
+    function buildTable(rows) {{
+        // Row layout: [title, doi, zenodo_id, youtube_id]
+        var table = $('#archiveTable').DataTable({{
+            "data": rows,
+            "deferRender": true,
+            "paging": true,
+            "searching": true,
+            "ordering": true,
+            "columns": [
+                {{ "data": 0, "render": function(d, type) {{ return type === 'display' ? escapeHtml(d) : d; }} }},
+                {{ "data": 1, "render": function(d, type) {{
+                    return type === 'display' ? '<a href="https://doi.org/' + escapeHtml(d) + '" target="_blank">' + escapeHtml(d) + '</a>' : d;
+                }} }},
+                {{ "data": 2, "orderable": false, "searchable": false, "render": function(d) {{
+                    return '<a href="#" class="citation-btn" data-zenodo="' + d + '">Cite</a>';
+                }} }},
+                {{ "data": 2, "render": function(d, type) {{
+                    return type === 'display' ? '<a href="https://zenodo.org/record/' + d + '" target="_blank">' + d + '</a>' : d;
+                }} }},
+                {{ "data": 3, "render": function(d, type) {{
+                    return type === 'display' ? '<a href="https://www.youtube.com/watch?v=' + escapeHtml(d) + '" target="_blank">' + escapeHtml(d) + '</a>' : d;
+                }} }}
+            ]
+        }});
+
+        $('#archiveTable tbody').on('click', '.citation-btn', function(event) {{
+            event.preventDefault();
+            var row = table.row($(this).closest('tr')).data();
+            var zenodoId = String(row[2]);
+            $('#citationModalLabel').text(row[0]);
+            $('#citationBibtex').text('Loading...');
+            $('#citationModal').modal('show');
+            loadBibtex().then(function(bibtex) {{
+                $('#citationBibtex').text(bibtex[zenodoId] || 'Unavailable');
+            }}, function() {{
+                $('#citationBibtex').text('Unavailable');
+            }});
+        }});
+    }}
+
+    $(document).ready(function() {{
+        {load_data}
+    }});
+</script>
+</body>
+</html>
+"""
+
+INLINE_DATA_SCRIPT = '<script id="archiveData" type="application/json">{payload}</script>'
+INLINE_LOAD = "buildTable(JSON.parse(document.getElementById('archiveData').textContent));"
+SIDECAR_LOAD = "fetch({data_url}).then(function(r) {{ return r.json(); }}).then(buildTable);"
+
+
+def table_payload(rows):
+    return [[row["title"], row["doi"], row["zenodo_id"], row["youtube_id"]] for row in rows]
+
+
+def _script_json(value):
+    """Compact JSON that is safe inside a <script> element."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).replace("</", "<\\/")
+
+
+def _write_json(path, value):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as file:
+        json.dump(value, file, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def write_json_page(path, rows, get_bibtex, sidecar=False):
+    """Write the DataTables page plus its JSON payload.
+
+    The BibTeX map is always written to ``<page>_bibtex.json``. The table rows
+    are embedded in the page, or written to ``<page>.json`` when ``sidecar`` is
+    set. Returns the paths written.
+    """
+    base = os.path.splitext(path)[0]
+    bibtex_path = f"{base}_bibtex.json"
+    _write_json(bibtex_path, {str(row["zenodo_id"]): get_bibtex(row["zenodo_id"]) or "Unavailable" for row in rows})
+    written = [path, bibtex_path]
+
+    payload = table_payload(rows)
+    if sidecar:
+        data_path = f"{base}.json"
+        _write_json(data_path, payload)
+        written.append(data_path)
+        data_script = ""
+        load_data = SIDECAR_LOAD.format(data_url=_script_json(os.path.basename(data_path)))
+    else:
+        data_script = INLINE_DATA_SCRIPT.format(payload=_script_json(payload))
+        load_data = INLINE_LOAD
+
+    footer = JSON_PAGE_FOOTER.format(
+        data_script=data_script,
+        load_data=load_data,
+        bibtex_url=_script_json(os.path.basename(bibtex_path)),
+    )
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8", buffering=WRITE_BUFFER_SIZE) as file:
+        file.write(HTML_HEAD)
+        file.write(TABLE_END)
+        file.write(footer)
+    os.replace(tmp_path, path)
+    return written
@@ -0,0 +1,325 @@
+"""Sharded static archive with a prebuilt, diacritic-folded search index.
+
+Output layout (``archive/`` by default)::
+
+    index.html            page shell; browses shard by shard, searches via the index
+    search-index.json     {"tokens": {token: [row, ...]}, "total": n, "shard_size": k}
+    shards/shard-0000.json
+    manifest.json         content hash of every file written, for incremental builds
+
+Rows keep their registry order, so a shard only changes when one of its rows
+does, and new uploads normally touch just the last shard. Files whose content
+hash matches the manifest are not rewritten.
+
+Tokens are folded with ``fold_text`` (NFKD, Latin combining marks removed,
+lowercased) so "Sarvamnaya" finds "Sarvāmnāya"; the page folds queries the
+same way and matches tokens by prefix. Titles always feed the index; tags and
+descriptions are added from the uploader's YouTube details cache, and transcript
+keywords and Sanskrit terms from ``enrichment/index.json``, when present.
+"""
+import hashlib
+import json
+import os
+import unicodedata
+
+from archive_html import PAGE_HEAD, TABLE_HEAD, TABLE_END
+
+OUTPUT_DIR = "archive"
+SHARD_SIZE = 100
+DETAILS_CACHE_PATH = "youtube_details_cache.json"
+ENRICHMENT_INDEX_PATH = "enrichment/index.json"
+MIN_TOKEN_LENGTH = 2
+STOP_WORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on",
+    "or", "that", "the", "this", "to", "with", "www", "https", "http", "com",
+}
+
+
+def fold_text(text):
+    """Lowercase and strip Latin diacritics (U+0300-U+036F) after NFKD; other scripts are untouched."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(c for c in decomposed if not 0x300 <= ord(c) <= 0x36F).lower()
+
+
+def tokenize(text):
+    """Split folded text into runs of letters, marks and digits."""
+    tokens = []
+    current = []
+    for c in fold_text(text):
+        if unicodedata.category(c)[0] in "LMN":
+            current.append(c)
+        elif current:
+            tokens.append("".join(current))
+            current = []
+    if current:
+        tokens.append("".join(current))
+    return [t for t in tokens if len(t) >= MIN_TOKEN_LENGTH and t not in STOP_WORDS]
+
+
+def load_details(path=DETAILS_CACHE_PATH, enrichment_path=ENRICHMENT_INDEX_PATH):
+    details = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as file:
+            details = {video_id: entry["details"] for video_id, entry in json.load(file).items()}
+    if enrichment_path and os.path.exists(enrichment_path):
+        with open(enrichment_path, encoding="utf-8") as file:
+            for video_id, entry in json.load(file).items():
+                details[video_id] = dict(details.get(video_id, {}), keywords=entry["keywords"], terms=entry["terms"])
+    return details
+
+
+def searchable_text(row, details):
+    info = details.get(row["youtube_id"], {})
+    return " ".join([row["title"], " ".join(info.get("tags", [])), info.get("description", ""),
+                     " ".join(info.get("terms", []) + info.get("keywords", []))])
+
+
+def build_index(rows, details):
+    postings = {}
+    for position, row in enumerate(rows):
+        for token in set(tokenize(searchable_text(row, details))):
+            postings.setdefault(token, []).append(position)
+    return {token: postings[token] for token in sorted(postings)}
+
+
+def _dump(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _digest(content):
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+
+
+class _IncrementalWriter:
+    """Writes files under ``root`` only when their content hash differs from the manifest."""
+
+    def __init__(self, root):
+        self.root = root
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.old = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as file:
+                self.old = json.load(file)
+        self.new = {}
+        self.written = []
+
+    def write(self, name, content):
+        digest = _digest(content)
+        self.new[name] = digest
+        path = os.path.join(self.root, name)
+        if self.old.get(name) == digest and os.path.exists(path):
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            file.write(content)
+        os.replace(tmp_path, path)
+        self.written.append(name)
+        return digest
+
+    def finish(self):
+        for name in set(self.old) - set(self.new):
+            stale = os.path.join(self.root, name)
+            if os.path.exists(stale):
+                os.remove(stale)
+        with open(self.manifest_path, "w", encoding="utf-8") as file:
+            json.dump(self.new, file, indent=1, sort_keys=True)
+
+
+def write_sharded_archive(rows, get_bibtex, output_dir=OUTPUT_DIR, shard_size=SHARD_SIZE,
+                          details_path=DETAILS_CACHE_PATH, enrichment_path=ENRICHMENT_INDEX_PATH):
+    """Build or update the sharded archive. Returns the list of files that were (re)written."""
+    os.makedirs(output_dir, exist_ok=True)
+    writer = _IncrementalWriter(output_dir)
+
+    shard_urls = []
+    for start in range(0, len(rows), shard_size):
+        shard = [
+            [row["title"], row["doi"], row["zenodo_id"], row["youtube_id"], get_bibtex(row["zenodo_id"]) or "Unavailable"]
+            for row in rows[start:start + shard_size]
+        ]
+        name = f"shards/shard-{start // shard_size:04d}.json"
+        digest = writer.write(name, _dump(shard))
+        shard_urls.append(f"{name}?v={digest}")
+
+    index = {"total": len(rows), "shard_size": shard_size, "tokens": build_index(rows, load_details(details_path, enrichment_path))}
+    index_digest = writer.write("search-index.json", _dump(index))
+
+    page = PAGE_HEAD + SEARCH_BAR + TABLE_HEAD + TABLE_END + SHARDED_PAGE_FOOTER.format(
+        config=_dump({
+            "shards": shard_urls,
+            "index": f"search-index.json?v={index_digest}",
+            "total": len(rows),
+            "shardSize": shard_size,
+            "minTokenLength": MIN_TOKEN_LENGTH,
+            "stopWords": sorted(STOP_WORDS),
+        }).replace("</", "<\\/"),
+    )
+    writer.write("index.html", page)
+    writer.finish()
+    return writer.written
+
+
+SEARCH_BAR = """
+    <div class="form-inline justify-content-between">
+        <input type="search" class="form-control" id="archiveSearch" placeholder="Search titles, keywords, descriptions" style="min-width: 50%;">
+        <div>
+            <button class="btn btn-sm btn-outline-secondary" id="prevPage">&laquo; Previous</button>
+            <span id="pageInfo" class="mx-2"></span>
+            <button class="btn btn-sm btn-outline-secondary" id="nextPage">Next &raquo;</button>
+        </div>
+    </div>
+"""
+
+SHARDED_PAGE_FOOTER = """
+<div class="modal fade" id="citationModal" tabindex="-1" role="dialog" aria-labelledby="citationModalLabel" aria-hidden="true">
+  <div class="modal-dialog modal-lg" role="document">
+    <div class="modal-content">
+      <div class="modal-header">
+        <h5 class="modal-title" id="citationModalLabel"></h5>
+        <button type="button" class="close" data-dismiss="modal" aria-label="Close">
+          <span aria-hidden="true">&times;</span>
+        </button>
+      </div>
+      <div class="modal-body">
+        <strong>BibTeX:</strong><br>
+        <pre id="citationBibtex"></pre>
+      </div>
+    </div>
+  </div>
+</div>
+
+<script src="https://code.jquery.com/jquery-3.5.1.slim.min.js"></script>
+<script src="https://cdn.jsdelivr.net/npm/bootstrap@4.5.3/dist/js/bootstrap.bundle.min.js"></script>
+<script>
+    var ARCHIVE = {config};
+    var shardCache = {{}};
+    var indexPromise = null;
+    var results = null;  // null while browsing, else matching row positions
+    var page = 0;
+
+    function loadShard(n) {{
+        if (!shardCache[n]) {{
+            shardCache[n] = fetch(ARCHIVE.shards[n]).then(function(r) {{ return r.json(); }});
+        }}
+        return shardCache[n];
+    }}
+
+    function loadIndex() {{
+        if (!indexPromise) {{
+            indexPromise = fetch(ARCHIVE.index).then(function(r) {{ return r.json(); }});
+        }}
+        return indexPromise;
+    }}
+
+    // Must match archive_shards.fold_text / tokenize
+    function tokenize(text) {{
+        var folded = text.normalize('NFKD').replace(/[\\u0300-\\u036f]/g, '').toLowerCase();
+        return folded.split(/[^\\p{{L}}\\p{{M}}\\p{{N}}]+/u).filter(function(t) {{
+            return t.length >= ARCHIVE.minTokenLength && ARCHIVE.stopWords.indexOf(t) < 0;
+        }});
+    }}
+
+    function search(query) {{
+        var terms = tokenize(query);
+        if (!terms.length) {{
+            return Promise.resolve(null);
+        }}
+        return loadIndex().then(function(index) {{
+            var keys = Object.keys(index.tokens);
+            var matched = null;
+            terms.forEach(function(term) {{
+                var hits = {{}};
+                keys.forEach(function(key) {{
+                    if (key.lastIndexOf(term, 0) === 0) {{
+                        index.tokens[key].forEach(function(pos) {{ hits[pos] = true; }});
+                    }}
+                }});
+                matched = matched === null ? hits : Object.keys(matched).reduce(function(acc, pos) {{
+                    if (hits[pos]) {{ acc[pos] = true; }}
+                    return acc;
+                }}, {{}});
+            }});
+            return Object.keys(matched).map(Number).sort(function(a, b) {{ return a - b; }});
+        }});
+    }}
+
+    function cell(text, href) {{
+        var td = $('<td>');
+        if (href) {{
+            td.append($('<a target="_blank">').attr('href', href).text(text));
+        }} else {{
+            td.text(text);
+        }}
+        return td;
+    }}
+
+    function render(rows) {{
+        var tbody = $('#archiveTable tbody').empty();
+        rows.forEach(function(row) {{
+            var cite = $('<a href="#" class="citation-btn">Cite</a>').data('row', row);
+            $('<tr>')
+                .append(cell(row[0]))
+                .append(cell(row[1], 'https://doi.org/' + row[1]))
+                .append($('<td>').append(cite))
+                .append(cell(String(row[2]), 'https://zenodo.org/record/' + row[2]))
+                .append(cell(row[3], 'https://www.youtube.com/watch?v=' + row[3]))
+                .appendTo(tbody);
+        }});
+    }}
+
+    function show() {{
+        var size = ARCHIVE.shardSize;
+        var positions;
+        if (results === null) {{
+            positions = [];
+            for (var p = page * size; p < Math.min((page + 1) * size, ARCHIVE.total); p++) {{ positions.push(p); }}
+        }} else {{
+            positions = results.slice(page * size, (page + 1) * size);
+        }}
+        var count = results === null ? ARCHIVE.total : results.length;
+        var pages = Math.max(1, Math.ceil(count / size));
+        $('#pageInfo').text('Page ' + (page + 1) + ' of ' + pages + ' (' + count + ' records)');
+        $('#prevPage').prop('disabled', page === 0);
+        $('#nextPage').prop('disabled', page >= pages - 1);
+
+        var needed = [];
+        positions.forEach(function(p) {{
+            var s = Math.floor(p / size);
+            if (needed.indexOf(s) < 0) {{ needed.push(s); }}
+        }});
+        Promise.all(needed.map(loadShard)).then(function(shards) {{
+            var byShard = {{}};
+            needed.forEach(function(s, i) {{ byShard[s] = shards[i]; }});
+            render(positions.map(function(p) {{ return byShard[Math.floor(p / size)][p % size]; }}));
+        }});
+    }}
+
+    $(document).ready(function() {{
+        var timer = null;
+        $('#archiveSearch').on('input', function() {{
+            var query = this.value;
+            clearTimeout(timer);
+            timer = setTimeout(function() {{
+                search(query).then(function(found) {{
+                    results = found;
+                    page = 0;
+                    show();
+                }});
+            }}, 200);
+        }});
+        $('#prevPage').on('click', function() {{ page -= 1; show(); }});
+        $('#nextPage').on('click', function() {{ page += 1; show(); }});
+        $('#archiveTable tbody').on('click', '.citation-btn', function(event) {{
+            event.preventDefault();
+            var row = $(this).data('row');
+            $('#citationModalLabel').text(row[0]);
+            $('#citationBibtex').text(row[4]);
+            $('#citationModal').modal('show');
+        }});
+        show();
+    }});
+</script>
+</body>
+</html>
+"""
@@ -0,0 +1,106 @@
+"""Render time and peak memory of the archive page for synthetic registries.
+
+Compares the old approach (``rows_html += ...`` and one ``full_html`` string)
+with the streaming writer in ``archive_html``. Run from the repository root:
+
+    python benchmarks/bench_html_render.py [--sizes 1000 10000 100000] [--json results.json]
+"""
+import argparse
+import html
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from archive_html import HTML_FOOTER, HTML_HEAD, MODAL_TEMPLATE, ROW_TEMPLATE, TABLE_END, write_page  # noqa: E402
+
+BIBTEX = """@misc{timalsina_2023_%d,
+  author       = {Staneshwar Timalsina},
+  title        = {Synthetic lecture %d on Spanda and Pratyabhijñā},
+  year         = {2023},
+  publisher    = {Zenodo},
+  doi          = {10.5281/zenodo.%d},
+  url          = {https://doi.org/10.5281/zenodo.%d}
+}"""
+
+
+def synthetic_rows(count):
+    rows = []
+    for i in range(1, count + 1):
+        zenodo_id = 15000000 + i
+        rows.append({
+            "id": i,
+            "youtube_id": f"vid{i:08d}",
+            "zenodo_id": zenodo_id,
+            "title": f"Synthetic lecture {i} on Spanda & Pratyabhijñā - Ācārya Dr. Sthaneshwar Timalsina",
+            "doi": f"10.5281/zenodo.{zenodo_id}",
+            "zenodo_link": f"https://zenodo.org/record/{zenodo_id}",
+            "youtube_link": f"https://www.youtube.com/watch?v=vid{i:08d}",
+        })
+    return rows
+
+
+def synthetic_bibtex(zenodo_id):
+    return BIBTEX % (zenodo_id, zenodo_id, zenodo_id, zenodo_id)
+
+
+def render_concatenated(path, rows, get_bibtex):
+    """The pre-streaming generator: grow two strings, join them, write once."""
+    rows_html = ""
+    modals_html = ""
+    for row in rows:
+        title = html.escape(row["title"])
+        modal_id = f"citationModal{row['zenodo_id']}"
+        fields = {
+            "title": title, "doi": row["doi"], "doi_link": f"https://doi.org/{row['doi']}",
+            "modal_id": modal_id, "zenodo_id": row["zenodo_id"], "zenodo_link": row["zenodo_link"],
+            "youtube_id": row["youtube_id"], "youtube_link": row["youtube_link"],
+            "bibtex": html.escape(get_bibtex(row["zenodo_id"])),
+        }
+        rows_html += ROW_TEMPLATE.format_map(fields)
+        modals_html += MODAL_TEMPLATE.format_map(fields)
+    full_html = HTML_HEAD + rows_html + TABLE_END + modals_html + HTML_FOOTER
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(full_html)
+
+
+def measure(render, path, rows):
+    tracemalloc.start()
+    started = time.perf_counter()
+    render(path, rows, synthetic_bibtex)
+    seconds = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"seconds": round(seconds, 4), "peak_bytes": peak, "output_bytes": os.path.getsize(path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "archive.html")
+        for size in args.sizes:
+            rows = synthetic_rows(size)
+            for name, render in (("concatenated", render_concatenated), ("streaming", write_page)):
+                result = measure(render, path, rows)
+                result.update(renderer=name, rows=size)
+                results.append(result)
+                print(f"{name:<13} {size:>7} rows  {result['seconds']:>8.3f}s  "
+                      f"peak {result['peak_bytes'] / 1024 / 1024:>8.2f} MB  "
+                      f"output {result['output_bytes'] / 1024 / 1024:>8.2f} MB")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""End-to-end benchmark of the uploader pipeline against the local mock services.
+
+Runs ``zenodo-uploader.py``'s own functions (search.list listing, batched
+videos.list, download, deposition, bucket upload, publish) and the BibTeX
+fetch of the HTML generator against ``mock_services``, in a scratch directory.
+yt_dlp is replaced by a plain download of ``/media/<video_id>`` from the mock,
+so the download stage measures the same cache and disk path without YouTube.
+
+A scenario fixes the number and size of videos and the mock's latency,
+bandwidth, error rate and rate limit; any of them can be overridden on the
+command line. Results (throughput, p50/p99 per stage, peak RSS, per-host HTTP
+stats) are printed and written as JSON with ``--json`` for regression tracking:
+
+    python benchmarks/bench_pipeline.py --scenario small --json results.json
+    python benchmarks/bench_pipeline.py --scenario flaky --videos 50
+"""
+import argparse
+import importlib.util
+import json
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+from urllib.parse import urlsplit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import bibtex_cache  # noqa: E402
+import http_client  # noqa: E402
+from bibtex_cache import BibtexCache  # noqa: E402
+from instrumentation import percentile  # noqa: E402
+from mock_services import CHANNEL_ID, DEFAULT_CONFIG, MockProcess  # noqa: E402
+
+MB = 1024 * 1024
+
+SCENARIOS = {
+    # Many small files on a fast, healthy service: per-call overhead dominates
+    "small": {"videos": 40, "video_size": 2 * MB},
+    # Few large files over a capped link: transfer time dominates
+    "large": {"videos": 4, "video_size": 200 * MB, "bandwidth": 50 * MB},
+    # Realistic latency with injected 503s and a tight rate limit
+    "flaky": {"videos": 20, "video_size": 5 * MB, "latency": 0.05, "jitter": 0.05,
+              "error_rate": 0.05, "rate_limit": 30, "rate_window": 5.0},
+}
+CLIENT_REQUESTS_PER_SECOND = 100  # Starting rate of the client limiters; the mock's headers adjust it
+
+
+class StageTimer:
+    """Collects wall-clock durations per stage from any number of threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                with self.lock:
+                    self.samples.setdefault(stage, []).append(time.perf_counter() - started)
+        return timed
+
+    def summary(self):
+        with self.lock:
+            return {stage: summarize(values) for stage, values in self.samples.items()}
+
+
+def summarize(values):
+    return {
+        "count": len(values),
+        "total_seconds": round(sum(values), 4),
+        "p50_seconds": round(percentile(values, 0.50), 4),
+        "p99_seconds": round(percentile(values, 0.99), 4),
+        "max_seconds": round(max(values), 4),
+    }
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def load_uploader():
+    spec = importlib.util.spec_from_file_location("zenodo_uploader", os.path.join(ROOT, "zenodo-uploader.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def run_scenario(config, download_workers, upload_workers):
+    """Run one scenario in a scratch directory and return its results dict."""
+    timer = StageTimer()
+    with MockProcess(config) as mock, tempfile.TemporaryDirectory() as scratch:
+        cwd = os.getcwd()
+        os.chdir(scratch)
+        try:
+            for url in (mock.zenodo_url, mock.youtube_url):
+                http_client.get_limiter(urlsplit(url).netloc, CLIENT_REQUESTS_PER_SECOND)
+            uploader = load_uploader()
+            uploader.ZENODO_TOKEN = uploader.YOUTUBE_API_KEY = "benchmark"
+            uploader.ZENODO_URL = f"{mock.zenodo_url}/api/deposit/depositions"
+            uploader.YOUTUBE_API_URL = f"{mock.youtube_url}/youtube/v3"
+            bibtex_cache.BIBTEX_URL = f"{mock.zenodo_url}/record/{{zenodo_id}}/export/bibtex"
+
+            def download_from_mock(video_id, video_url):
+                cached = uploader.download_cache.lookup(video_id)
+                if cached:
+                    return cached
+                partial = os.path.join(uploader.download_cache.partial_dir, f"{video_id}.mp4")
+                response = uploader.youtube_session.get(f"{mock.youtube_url}/media/{video_id}", stream=True)
+                response.raise_for_status()
+                with open(partial, "wb") as file:
+                    for chunk in response.iter_content(1024 * 1024):
+                        file.write(chunk)
+                return uploader.download_cache.store(video_id, partial)
+
+            uploader.download_video = timer.wrap("download", download_from_mock)
+            for stage, name in (("deposit", "create_deposition"), ("upload", "upload_file_to_deposition"),
+                                ("publish", "publish_deposition")):
+                setattr(uploader, name, timer.wrap(stage, getattr(uploader, name)))
+            list_videos = timer.wrap("search.list", uploader.get_channel_videos)
+            prefetch = timer.wrap("videos.list", uploader.prefetch_video_details)
+            BibtexCache._fetch = timer.wrap("bibtex", BibtexCache._fetch)
+
+            started = time.perf_counter()
+            videos = list_videos(CHANNEL_ID, uploader.YOUTUBE_API_KEY)
+            prefetch([v["video_id"] for v in videos], uploader.YOUTUBE_API_KEY)
+            pipeline_started = time.perf_counter()
+            uploader.run_pipeline(videos, download_workers, upload_workers, max_pending_bytes=20 * 1024 * MB)
+            pipeline_seconds = time.perf_counter() - pipeline_started
+
+            published = [row["zenodo_id"] for row in uploader.registry.published_rows()]
+            bibtex_started = time.perf_counter()
+            counts = BibtexCache().fetch(published)
+            bibtex_seconds = time.perf_counter() - bibtex_started
+            wall = time.perf_counter() - started
+        finally:
+            os.chdir(cwd)
+
+    uploaded_bytes = len(published) * config["video_size"]
+    return {
+        "config": config,
+        "download_workers": download_workers,
+        "upload_workers": upload_workers,
+        "videos_listed": len(videos),
+        "videos_published": len(published),
+        "bibtex": counts,
+        "wall_seconds": round(wall, 3),
+        "pipeline_seconds": round(pipeline_seconds, 3),
+        "bibtex_seconds": round(bibtex_seconds, 3),
+        "throughput": {
+            "videos_per_minute": round(len(published) / pipeline_seconds * 60, 2) if pipeline_seconds else 0.0,
+            "upload_mb_per_second": round(uploaded_bytes / MB / pipeline_seconds, 2) if pipeline_seconds else 0.0,
+        },
+        "stages": timer.summary(),
+        "peak_rss_bytes": peak_rss_bytes(),
+        "http": http_client.stats.snapshot(),
+    }
+
+
+def print_results(name, results):
+    print(f"\n🏁 Scenario {name}: {results['videos_published']}/{results['videos_listed']} published "
+          f"in {results['pipeline_seconds']:.2f}s "
+          f"({results['throughput']['videos_per_minute']:.1f} videos/min, "
+          f"{results['throughput']['upload_mb_per_second']:.1f} MB/s), "
+          f"peak RSS {results['peak_rss_bytes'] / MB:.1f} MB")
+    for stage, entry in results["stages"].items():
+        print(f"  {stage:<12} {entry['count']:>5} calls  p50 {entry['p50_seconds'] * 1000:>8.1f} ms  "
+              f"p99 {entry['p99_seconds'] * 1000:>8.1f} ms  total {entry['total_seconds']:>8.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), default="small")
+    parser.add_argument("--videos", type=int, help="number of videos on the mock channel")
+    parser.add_argument("--size-mb", type=float, help="size of each video")
+    parser.add_argument("--latency", type=float, help="seconds added to every mock response")
+    parser.add_argument("--bandwidth-mbps", type=float, help="per-connection body rate of the mock in MB/s")
+    parser.add_argument("--error-rate", type=float, help="fraction of mock requests answered with 503")
+    parser.add_argument("--rate-limit", type=int, help="mock requests per window and service before 429s")
+    parser.add_argument("--download-workers", type=int, default=2)
+    parser.add_argument("--upload-workers", type=int, default=2)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    config = dict(SCENARIOS[args.scenario])
+    overrides = {
+        "videos": args.videos,
+        "video_size": int(args.size_mb * MB) if args.size_mb is not None else None,
+        "latency": args.latency,
+        "bandwidth": args.bandwidth_mbps * MB if args.bandwidth_mbps is not None else None,
+        "error_rate": args.error_rate,
+        "rate_limit": args.rate_limit,
+    }
+    config.update({k: v for k, v in overrides.items() if v is not None})
+    config = dict(DEFAULT_CONFIG, **config)
+
+    results = run_scenario(config, args.download_workers, args.upload_workers)
+    results["scenario"] = args.scenario
+    print_results(args.scenario, results)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
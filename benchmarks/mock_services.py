@@ -0,0 +1,540 @@
+"""Local stand-in for the Zenodo and YouTube endpoints the archive scripts call.
+
+Two HTTP servers share one in-memory state, one answering as Zenodo and one as
+the YouTube Data API, so clients keep a separate connection pool and rate
+limiter per service as they would in production. Emulated endpoints:
+
+    YouTube   GET  /youtube/v3/search, /videos, /channels, /playlistItems
+              GET  /media/<video_id>                       (the video file itself)
+    Zenodo    POST /api/deposit/depositions                GET  ...?status=draft&page&size
+              GET  /api/deposit/depositions/<id>           PUT  /api/deposit/depositions/<id>
+              DELETE /api/deposit/depositions/<id>
+              POST /api/deposit/depositions/<id>/actions/publish | edit
+              GET  /api/files/<bucket>                     PUT  /api/files/<bucket>/<key>
+              GET  /record/<id>/export/bibtex              (ETag / If-None-Match)
+              GET  /api/records/<id>                       (published records only)
+              GET  /api/communities/<slug>                 GET  /api/communities/<id>/requests
+              POST /api/requests/<id>/actions/accept
+
+Every response is delayed by ``latency`` (plus up to ``jitter``), request and
+response bodies move at ``bandwidth`` bytes/s per connection, a fraction
+``error_rate`` of requests fail with 503, and with ``rate_limit`` each service
+allows that many requests per ``rate_window`` seconds, sends
+``X-RateLimit-*`` headers and answers 429 with ``Retry-After`` beyond it.
+Publishing a deposition opens a community submission request for it.
+
+Run standalone for manual testing::
+
+    python benchmarks/mock_services.py --videos 20 --latency 0.05 --rate-limit 100
+"""
+import argparse
+import hashlib
+import json
+import math
+import multiprocessing
+import random
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+DEFAULT_CONFIG = {
+    "videos": 20,
+    "video_size": 5 * 1024 * 1024,
+    "latency": 0.0,
+    "jitter": 0.0,
+    "bandwidth": None,
+    "error_rate": 0.0,
+    "rate_limit": None,
+    "rate_window": 10.0,
+    "seed": 0,
+}
+CHANNEL_ID = "UC4wAYkt8_U1TJOfXkfpjAsw"
+COMMUNITY_SLUG = "sarvamnaya-oral-tradition-archive"
+COMMUNITY_ID = "00000000-0000-0000-0000-00000000c0de"
+IO_CHUNK = 64 * 1024
+
+
+class MockState:
+    """Channel videos, depositions, buckets and community requests, shared by both servers."""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.random = random.Random(config["seed"])
+        self.videos = [
+            {
+                "id": f"mock{i:07d}",
+                "title": f"Mock lecture {i} on Spanda and Pratyabhijñā",
+                "description": f"Recording {i} of a synthetic channel.",
+                "tags": ["spanda", "pratyabhijñā", f"series-{i % 5}"],
+                "published_at": f"2024-{1 + i // 28 % 12:02d}-{1 + i % 28:02d}T10:00:00Z",
+            }
+            for i in range(config["videos"])
+        ]
+        self.videos.sort(key=lambda v: v["published_at"], reverse=True)
+        self.depositions = {}
+        self.buckets = {}
+        self.requests = {}
+        self.next_id = 90000001
+        self.windows = {}
+
+    def fail(self):
+        with self.lock:
+            return self.random.random() < self.config["error_rate"]
+
+    def take_token(self, service):
+        """Fixed-window rate limit per service. Returns (allowed, headers)."""
+        limit = self.config["rate_limit"]
+        if not limit:
+            return True, {}
+        window = self.config["rate_window"]
+        now = time.time()
+        with self.lock:
+            start, used = self.windows.get(service, (now, 0))
+            if now - start >= window:
+                start, used = now, 0
+            allowed = used < limit
+            if allowed:
+                used += 1
+            self.windows[service] = (start, used)
+        reset = start + window
+        headers = {
+            "X-RateLimit-Limit": str(limit),
+            "X-RateLimit-Remaining": str(limit - used),
+            "X-RateLimit-Reset": str(int(math.ceil(reset))),
+        }
+        if not allowed:
+            headers["Retry-After"] = str(max(1, int(math.ceil(reset - now))))
+        return allowed, headers
+
+
+def media_bytes(video_id, size):
+    """Deterministic, per-video content of ``size`` bytes, produced in chunks."""
+    block = hashlib.sha256(video_id.encode()).digest() * (IO_CHUNK // 32)
+    remaining = size
+    while remaining > 0:
+        chunk = block[:min(IO_CHUNK, remaining)]
+        remaining -= len(chunk)
+        yield chunk
+
+
+def make_handler(state, service):
+    """Request handler class for one service ("zenodo" or "youtube") over ``state``."""
+    config = state.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def throttle(self, started, done):
+            """Sleep so that ``done`` bytes since ``started`` stay within the configured bandwidth."""
+            bandwidth = config["bandwidth"]
+            if bandwidth:
+                ahead = done / bandwidth - (time.monotonic() - started)
+                if ahead > 0:
+                    time.sleep(ahead)
+
+        def read_body(self):
+            """Read the request body. File uploads are hashed as they stream in, JSON is parsed."""
+            length = int(self.headers.get("Content-Length") or 0)
+            self.json_body = {}
+            if not self.path.startswith("/api/files/"):
+                raw = self.rfile.read(length) if length else b""
+                try:
+                    self.json_body = json.loads(raw) if raw else {}
+                except ValueError:
+                    pass
+                return
+            digest = hashlib.md5()
+            started = time.monotonic()
+            done = 0
+            while done < length:
+                chunk = self.rfile.read(min(IO_CHUNK, length - done))
+                if not chunk:
+                    break
+                digest.update(chunk)
+                done += len(chunk)
+                self.throttle(started, done)
+            self.body_size, self.body_md5 = done, digest.hexdigest()
+
+        def send(self, status, body=b"", content_type="application/json", headers=None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in {**self.limit_headers, **(headers or {})}.items():
+                self.send_header(key, value)
+            self.end_headers()
+            started = time.monotonic()
+            for offset in range(0, len(body), IO_CHUNK):
+                self.wfile.write(body[offset:offset + IO_CHUNK])
+                self.throttle(started, offset + IO_CHUNK)
+
+        def handle_method(self, method):
+            url = urlsplit(self.path)
+            self.query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            self.base = f"http://{self.headers['Host']}"
+            self.limit_headers = {}
+            if method in ("PUT", "POST"):
+                self.read_body()
+            time.sleep(config["latency"] + state.random.uniform(0, config["jitter"]))
+
+            allowed, self.limit_headers = state.take_token(service)
+            if not allowed:
+                return self.send(429, {"status": 429, "message": "Too many requests"})
+            if state.fail():
+                return self.send(503, {"status": 503, "message": "Injected failure"})
+
+            for pattern, route_method, route in ROUTES[service]:
+                match = re.fullmatch(pattern, url.path)
+                if match and route_method == method:
+                    return route(self, state, *match.groups())
+            self.send(404, {"status": 404, "message": f"No mock for {method} {url.path}"})
+
+        def do_GET(self):
+            self.handle_method("GET")
+
+        def do_POST(self):
+            self.handle_method("POST")
+
+        def do_PUT(self):
+            self.handle_method("PUT")
+
+        def do_DELETE(self):
+            self.handle_method("DELETE")
+
+    return Handler
+
+
+# ---------------- YouTube routes ----------------
+def _page(handler, items, size):
+    start = int(handler.query.get("pageToken") or 0)
+    body = {"items": items[start:start + size]}
+    if start + size < len(items):
+        body["nextPageToken"] = str(start + size)
+    return body
+
+
+def yt_search(handler, state):
+    items = [
+        {"id": {"kind": "youtube#video", "videoId": v["id"]},
+         "snippet": {"title": v["title"], "description": v["description"], "publishedAt": v["published_at"]}}
+        for v in state.videos
+    ]
+    handler.send(200, _page(handler, items, int(handler.query.get("maxResults", 50))))
+
+
+def yt_videos(handler, state):
+    wanted = set(handler.query.get("id", "").split(","))
+    items = [
+        {"id": v["id"], "etag": hashlib.md5(v["id"].encode()).hexdigest(),
+         "snippet": {"title": v["title"], "description": v["description"], "tags": v["tags"],
+                     "publishedAt": v["published_at"]}}
+        for v in state.videos if v["id"] in wanted
+    ]
+    handler.send(200, {"items": items})
+
+
+def yt_channels(handler, state):
+    uploads = "UU" + handler.query.get("id", CHANNEL_ID)[2:]
+    handler.send(200, {"items": [{"contentDetails": {"relatedPlaylists": {"uploads": uploads}}}]})
+
+
+def yt_playlist_items(handler, state):
+    items = [
+        {"snippet": {"resourceId": {"videoId": v["id"]}, "title": v["title"], "description": v["description"],
+                     "publishedAt": v["published_at"], "videoPublishedAt": v["published_at"]}}
+        for v in state.videos
+    ]
+    handler.send(200, _page(handler, items, int(handler.query.get("maxResults", 50))))
+
+
+def yt_media(handler, state, video_id):
+    size = state.config["video_size"]
+    handler.send_response(200)
+    handler.send_header("Content-Type", "video/mp4")
+    handler.send_header("Content-Length", str(size))
+    handler.end_headers()
+    started = time.monotonic()
+    done = 0
+    for chunk in media_bytes(video_id, size):
+        handler.wfile.write(chunk)
+        done += len(chunk)
+        handler.throttle(started, done)
+
+
+# ---------------- Zenodo routes ----------------
+def _deposition(state, deposition_id):
+    with state.lock:
+        return state.depositions.get(int(deposition_id))
+
+
+def _with_files(state, deposition):
+    """The deposition as the API shows it, with its bucket's files in the deposit format."""
+    with state.lock:
+        contents = list(state.buckets.get(deposition["bucket"], {}).values())
+        return dict(deposition, files=[
+            {"filename": f["key"], "filesize": f["size"], "checksum": f["checksum"].split(":", 1)[1]}
+            for f in contents
+        ])
+
+
+def zd_create(handler, state):
+    with state.lock:
+        deposition_id = state.next_id
+        state.next_id += 1
+        bucket = str(uuid.UUID(int=deposition_id))
+        state.buckets[bucket] = {}
+        deposition = {
+            "id": deposition_id,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S.000000+00:00", time.gmtime()),
+            "submitted": False,
+            "state": "unsubmitted",
+            "metadata": handler.json_body.get("metadata", {}),
+            "links": {"bucket": f"{handler.base}/api/files/{bucket}"},
+            "bucket": bucket,
+        }
+        state.depositions[deposition_id] = deposition
+    handler.send(201, deposition)
+
+
+def zd_list(handler, state):
+    size = int(handler.query.get("size", 10))
+    page = int(handler.query.get("page", 1))
+    status = handler.query.get("status")
+    with state.lock:
+        found = [d for d in state.depositions.values()
+                 if status is None or (status == "draft") != d["submitted"]]
+    found.sort(key=lambda d: d["id"], reverse=handler.query.get("sort") == "mostrecent")
+    handler.send(200, [_with_files(state, d) for d in found[(page - 1) * size: page * size]])
+
+
+def zd_get(handler, state, deposition_id):
+    deposition = _deposition(state, deposition_id)
+    if deposition is None:
+        return handler.send(404, {"status": 404, "message": "PID does not exist."})
+    handler.send(200, _with_files(state, deposition))
+
+
+def zd_record(handler, state, record_id):
+    deposition = _deposition(state, record_id)
+    if deposition is None or not deposition["submitted"]:
+        return handler.send(404, {"status": 404, "message": "PID does not exist."})
+    with state.lock:
+        files = list(state.buckets.get(deposition["bucket"], {}).values())
+    handler.send(200, {"id": deposition["id"], "doi": deposition["doi"], "metadata": deposition["metadata"],
+                       "files": files})
+
+
+def zd_update(handler, state, deposition_id):
+    deposition = _deposition(state, deposition_id)
+    if deposition is None:
+        return handler.send(404, {"status": 404, "message": "PID does not exist."})
+    if deposition["state"] == "done":
+        return handler.send(400, {"status": 400, "message": "Deposition is published; call actions/edit first."})
+    with state.lock:
+        deposition["metadata"] = dict(handler.json_body.get("metadata", {}), doi=deposition["metadata"].get("doi"))
+    handler.send(200, deposition)
+
+
+def zd_delete(handler, state, deposition_id):
+    with state.lock:
+        deposition = state.depositions.get(int(deposition_id))
+        if deposition and not deposition["submitted"]:
+            del state.depositions[int(deposition_id)]
+            return handler.send(204)
+    handler.send(403 if deposition else 404, {"status": 403 if deposition else 404})
+
+
+def zd_publish(handler, state, deposition_id):
+    deposition = _deposition(state, deposition_id)
+    if deposition is None:
+        return handler.send(404, {"status": 404, "message": "PID does not exist."})
+    with state.lock:
+        if not state.buckets.get(deposition["bucket"]):
+            return handler.send(400, {"status": 400, "message": "Minimum one file must be provided."})
+        doi = f"10.5072/zenodo.{deposition['id']}"
+        deposition.update(submitted=True, state="done", doi=doi)
+        deposition["metadata"]["doi"] = doi
+        request_id = str(uuid.UUID(int=deposition["id"] << 8))
+        state.requests.setdefault(request_id, {
+            "id": request_id, "type": "community-submission", "is_open": True,
+            "title": deposition["metadata"].get("title", "Untitled"),
+        })
+    handler.send(202, deposition)
+
+
+def zd_edit(handler, state, deposition_id):
+    deposition = _deposition(state, deposition_id)
+    if deposition is None:
+        return handler.send(404, {"status": 404, "message": "PID does not exist."})
+    with state.lock:
+        deposition["state"] = "inprogress"
+    handler.send(201, deposition)
+
+
+def zd_bucket(handler, state, bucket):
+    with state.lock:
+        contents = list(state.buckets.get(bucket, {}).values())
+    handler.send(200, {"contents": contents})
+
+
+def zd_put_file(handler, state, bucket, key):
+    entry = {"key": key, "size": handler.body_size, "checksum": f"md5:{handler.body_md5}"}
+    with state.lock:
+        if bucket not in state.buckets:
+            return handler.send(404, {"status": 404, "message": "Bucket does not exist."})
+        state.buckets[bucket][key] = entry
+    handler.send(201, entry)
+
+
+def zd_bibtex(handler, state, deposition_id):
+    deposition = _deposition(state, deposition_id)
+    if deposition is None or not deposition["submitted"]:
+        return handler.send(404, b"Not found", "text/plain")
+    title = deposition["metadata"].get("title", "Untitled")
+    bibtex = (f"@misc{{mock_{deposition_id},\n  title = {{{title}}},\n  publisher = {{Zenodo}},\n"
+              f"  doi = {{{deposition['doi']}}}\n}}").encode("utf-8")
+    etag = f'"{hashlib.md5(bibtex).hexdigest()}"'
+    if handler.headers.get("If-None-Match") == etag:
+        return handler.send(304, headers={"ETag": etag})
+    handler.send(200, bibtex, "text/x-bibtex; charset=utf-8", {"ETag": etag})
+
+
+def zd_community(handler, state, slug):
+    if slug not in (COMMUNITY_SLUG, COMMUNITY_ID):
+        return handler.send(404, {"status": 404, "message": "Community not found."})
+    handler.send(200, {"id": COMMUNITY_ID, "slug": COMMUNITY_SLUG})
+
+
+def zd_community_requests(handler, state, community_id):
+    size = int(handler.query.get("size", 10))
+    page = int(handler.query.get("page", 1))
+    with state.lock:
+        found = [r for r in state.requests.values() if r["is_open"] or handler.query.get("is_open") != "true"]
+    body = {"hits": {"hits": found[(page - 1) * size: page * size], "total": len(found)}, "links": {}}
+    if page * size < len(found):
+        body["links"]["next"] = (f"{handler.base}/api/communities/{community_id}/requests"
+                                 f"?is_open={handler.query.get('is_open', 'false')}&size={size}&page={page + 1}")
+    handler.send(200, body)
+
+
+def zd_accept(handler, state, request_id):
+    with state.lock:
+        request = state.requests.get(request_id)
+        if request is None or not request["is_open"]:
+            return handler.send(404 if request is None else 400, {"status": 400, "message": "Request is closed."})
+        request.update(is_open=False, status="accepted")
+    handler.send(200, request)
+
+
+ROUTES = {
+    "youtube": [
+        (r"/youtube/v3/search", "GET", yt_search),
+        (r"/youtube/v3/videos", "GET", yt_videos),
+        (r"/youtube/v3/channels", "GET", yt_channels),
+        (r"/youtube/v3/playlistItems", "GET", yt_playlist_items),
+        (r"/media/([\w-]+)", "GET", yt_media),
+    ],
+    "zenodo": [
+        (r"/api/deposit/depositions", "POST", zd_create),
+        (r"/api/deposit/depositions", "GET", zd_list),
+        (r"/api/deposit/depositions/(\d+)", "GET", zd_get),
+        (r"/api/deposit/depositions/(\d+)", "PUT", zd_update),
+        (r"/api/deposit/depositions/(\d+)", "DELETE", zd_delete),
+        (r"/api/deposit/depositions/(\d+)/actions/publish", "POST", zd_publish),
+        (r"/api/deposit/depositions/(\d+)/actions/edit", "POST", zd_edit),
+        (r"/api/files/([\w-]+)", "GET", zd_bucket),
+        (r"/api/files/([\w-]+)/(.+)", "PUT", zd_put_file),
+        (r"/records?/(\d+)/export/bibtex", "GET", zd_bibtex),
+        (r"/api/records/(\d+)", "GET", zd_record),
+        (r"/api/communities/([\w-]+)", "GET", zd_community),
+        (r"/api/communities/([\w-]+)/requests", "GET", zd_community_requests),
+        (r"/api/requests/([\w-]+)/actions/accept", "POST", zd_accept),
+    ],
+}
+
+
+def serve(config=None):
+    """Start both servers in background threads. Returns (state, zenodo_server, youtube_server)."""
+    config = dict(DEFAULT_CONFIG, **(config or {}))
+    state = MockState(config)
+    servers = []
+    for service in ("zenodo", "youtube"):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state, service))
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return state, servers[0], servers[1]
+
+
+def _child(config, conn):
+    _, zenodo, youtube = serve(config)
+    conn.send((zenodo.server_port, youtube.server_port))
+    conn.recv()  # Block until the parent asks us to stop
+
+
+class MockProcess:
+    """Runs the mock servers in a child process so they don't share the client's GIL or memory.
+
+    Use as a context manager; ``zenodo_url`` and ``youtube_url`` are the base URLs.
+    """
+
+    def __init__(self, config=None):
+        self.config = config
+
+    def __enter__(self):
+        self.conn, child_conn = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=_child, args=(self.config, child_conn), daemon=True)
+        self.process.start()
+        zenodo_port, youtube_port = self.conn.recv()
+        self.zenodo_url = f"http://127.0.0.1:{zenodo_port}"
+        self.youtube_url = f"http://127.0.0.1:{youtube_port}"
+        return self
+
+    def __exit__(self, *exc):
+        self.conn.send("stop")
+        self.process.join(timeout=5)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve mock Zenodo and YouTube endpoints until interrupted.")
+    parser.add_argument("--videos", type=int, default=DEFAULT_CONFIG["videos"])
+    parser.add_argument("--size-mb", type=float, default=DEFAULT_CONFIG["video_size"] / 1024 / 1024)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds, uniformly")
+    parser.add_argument("--bandwidth-mbps", type=float, help="per-connection body rate in MB/s")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--rate-limit", type=int, help="requests per window and service before 429s")
+    parser.add_argument("--rate-window", type=float, default=DEFAULT_CONFIG["rate_window"])
+    args = parser.parse_args()
+
+    state, zenodo, youtube = serve({
+        "videos": args.videos,
+        "video_size": int(args.size_mb * 1024 * 1024),
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "bandwidth": args.bandwidth_mbps * 1024 * 1024 if args.bandwidth_mbps else None,
+        "error_rate": args.error_rate,
+        "rate_limit": args.rate_limit,
+        "rate_window": args.rate_window,
+    })
+    print(f"Zenodo:  http://127.0.0.1:{zenodo.server_port}/api")
+    print(f"YouTube: http://127.0.0.1:{youtube.server_port}/youtube/v3")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""On-disk BibTeX cache for Zenodo records, filled by a concurrent, rate-limited fetcher.
+
+Entries are keyed by zenodo_id and keep the ETag/Last-Modified validators of
+the export response. Published records rarely change, so cached entries are
+used as-is; ``revalidate=True`` re-checks them with conditional requests and
+only downloads the ones Zenodo reports as changed.
+
+Requests go through the shared zenodo.org limiter of ``http_client``, so the
+fetch rate follows Zenodo's rate-limit headers from
+``http_client.ZENODO_REQUESTS_PER_SECOND`` on unless a rate is passed.
+"""
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from http_client import get_limiter, get_session
+
+CACHE_PATH = "bibtex_cache.json"
+BIBTEX_URL = "https://zenodo.org/record/{zenodo_id}/export/bibtex"
+FETCH_WORKERS = 4
+
+
+class BibtexCache:
+    def __init__(self, path=CACHE_PATH, workers=FETCH_WORKERS, requests_per_second=None):
+        self.path = path
+        self.workers = workers
+        get_limiter("zenodo.org", requests_per_second)
+        self.session = get_session("zenodo", pool_maxsize=workers)
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.updated = set()  # ids whose BibTeX was (re)downloaded by this instance
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def get(self, zenodo_id):
+        entry = self.entries.get(str(zenodo_id))
+        return entry["bibtex"] if entry else None
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def _fetch(self, zenodo_id):
+        """Fetch one record, conditionally if it is cached. Returns 'new', 'unchanged' or 'failed'."""
+        key = str(zenodo_id)
+        cached = self.entries.get(key)
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        if cached and cached.get("last_modified"):
+            headers["If-Modified-Since"] = cached["last_modified"]
+
+        try:
+            response = self.session.get(BIBTEX_URL.format(zenodo_id=zenodo_id), headers=headers)
+        except Exception as e:
+            print(f"⚠️ BibTeX fetch failed for {zenodo_id}: {e}")
+            return "failed"
+        if response.status_code == 304 and cached:
+            return "unchanged"
+        if not response.ok:
+            print(f"⚠️ BibTeX fetch failed for {zenodo_id}: {response.status_code}")
+            return "failed"
+
+        with self.lock:
+            self.entries[key] = {
+                "bibtex": response.text.strip(),
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+            }
+            self.updated.add(key)
+        return "new"
+
+    def fetch(self, zenodo_ids, revalidate=False):
+        """Make sure every id is cached. Returns a count of results per outcome."""
+        wanted = [z for z in zenodo_ids if revalidate or str(z) not in self.entries]
+        counts = {"cached": len(zenodo_ids) - len(wanted), "new": 0, "unchanged": 0, "failed": 0}
+        if not wanted:
+            return counts
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for outcome in pool.map(self._fetch, wanted):
+                counts[outcome] += 1
+        self.save()
+        return counts
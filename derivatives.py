@@ -0,0 +1,91 @@
+"""ffmpeg derivatives (audio-only, capped-bitrate video) of downloaded videos.
+
+Most deposits are lectures where full-resolution video adds little, so a
+deposit can carry one or more smaller renditions instead of, or next to, the
+original. Transcodes run in a process pool (one ffmpeg per core by default);
+each output is written to a temporary name and renamed when complete, so an
+existing derivative file is always a finished one and is reused.
+"""
+import os
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+FFMPEG = "ffmpeg"
+
+PROFILES = {
+    # Speech-quality Opus audio, a few MB per hour
+    "audio-opus": {
+        "suffix": ".opus",
+        "args": ["-vn", "-c:a", "libopus", "-b:a", "48k", "-application", "voip"],
+    },
+    # The original AAC track without re-encoding
+    "audio-m4a": {
+        "suffix": ".m4a",
+        "args": ["-vn", "-c:a", "copy"],
+    },
+    # Talking-head video capped at 480p / ~600 kbit/s
+    "video-480p": {
+        "suffix": "_480p.mp4",
+        "args": [
+            "-vf", "scale=-2:'min(480,ih)'",
+            "-c:v", "libx264", "-preset", "veryfast", "-crf", "28", "-maxrate", "600k", "-bufsize", "1200k",
+            "-c:a", "aac", "-b:a", "96k", "-movflags", "+faststart",
+        ],
+    },
+}
+
+
+def derivative_path(source_path, profile):
+    return os.path.splitext(source_path)[0] + PROFILES[profile]["suffix"]
+
+
+def transcode(source_path, profile):
+    """Create one derivative. Returns (path, size_bytes, seconds). Runs in a worker process."""
+    target = derivative_path(source_path, profile)
+    started = time.monotonic()
+    if not os.path.exists(target):
+        root, ext = os.path.splitext(target)
+        partial = f"{root}.partial{ext}"
+        command = [FFMPEG, "-y", "-loglevel", "error", "-i", source_path] + PROFILES[profile]["args"] + [partial]
+        try:
+            subprocess.run(command, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            if os.path.exists(partial):
+                os.remove(partial)
+            raise
+        os.replace(partial, target)
+    return target, os.path.getsize(target), time.monotonic() - started
+
+
+class DerivativeStage:
+    """Turns a downloaded file into the list of files to deposit, using a shared process pool."""
+
+    def __init__(self, profiles, keep_original=True, workers=None):
+        unknown = [p for p in profiles if p not in PROFILES]
+        if unknown:
+            raise ValueError(f"Unknown derivative profile(s): {', '.join(unknown)}")
+        if not profiles and not keep_original:
+            raise ValueError("Nothing to upload: no derivative profiles and the original is dropped")
+        self.profiles = list(profiles)
+        self.keep_original = keep_original
+        self.pool = ProcessPoolExecutor(max_workers=workers or os.cpu_count()) if profiles else None
+
+    def run(self, source_path):
+        """Return {"files": [...], "original_bytes", "upload_bytes", "seconds"} for one video."""
+        started = time.monotonic()
+        original_bytes = os.path.getsize(source_path)
+        files = [source_path] if self.keep_original else []
+        if self.pool:
+            futures = [self.pool.submit(transcode, source_path, p) for p in self.profiles]
+            files.extend(f.result()[0] for f in futures)
+        return {
+            "files": files,
+            "original_bytes": original_bytes,
+            "upload_bytes": sum(os.path.getsize(f) for f in files),
+            "seconds": time.monotonic() - started,
+        }
+
+    def shutdown(self):
+        if self.pool:
+            self.pool.shutdown()
@@ -0,0 +1,141 @@
+"""Download cache for DOWNLOAD_DIR, keyed by YouTube video id.
+
+Files are stored as ``<video_id>.mp4``, so two videos whose titles sanitize to
+the same name can no longer collide. yt_dlp writes into ``.partial/`` and a
+file only enters the cache through ``store()``, which hashes it, renames it
+into place and records its size and SHA-256 in ``manifest.json``. A cached
+file whose size no longer matches the manifest is treated as missing.
+
+Identical content under two video ids is kept once (hard link). When the cache
+exceeds ``max_bytes``, files of videos that are already published are evicted,
+least recently used first, together with their derivatives.
+"""
+import glob
+import hashlib
+import json
+import os
+import threading
+import time
+
+MAX_CACHE_BYTES = 50 * 1024 ** 3
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    def __init__(self, root, max_bytes=MAX_CACHE_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.partial_dir = os.path.join(root, ".partial")
+        self.manifest_path = os.path.join(root, "manifest.json")
+        self.lock = threading.RLock()
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.entries = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def save(self):
+        tmp_path = f"{self.manifest_path}.tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, indent=1)
+            os.replace(tmp_path, self.manifest_path)
+
+    def path_for(self, video_id, ext=".mp4"):
+        return os.path.join(self.root, f"{video_id}{ext}")
+
+    def lookup(self, video_id):
+        """Return the cached file for ``video_id`` if it is complete, else None."""
+        with self.lock:
+            entry = self.entries.get(video_id)
+            if not entry:
+                return None
+            path = entry["path"]
+            if not os.path.exists(path) or os.path.getsize(path) != entry["size"]:
+                del self.entries[video_id]
+                self.save()
+                return None
+            entry["last_used"] = time.time()
+            return path
+
+    def entry(self, video_id):
+        with self.lock:
+            entry = self.entries.get(video_id)
+            return dict(entry) if entry else None
+
+    def store(self, video_id, finished_path):
+        """Move a completely downloaded file into the cache and return its cached path."""
+        size = os.path.getsize(finished_path)
+        sha256 = sha256_file(finished_path)
+        target = self.path_for(video_id, os.path.splitext(finished_path)[1])
+        with self.lock:
+            twin = next(
+                (e for vid, e in self.entries.items()
+                 if vid != video_id and e["sha256"] == sha256 and os.path.exists(e["path"])),
+                None,
+            )
+            if twin:
+                if os.path.exists(target):
+                    os.remove(target)
+                try:
+                    os.link(twin["path"], target)
+                    os.remove(finished_path)
+                except OSError:
+                    os.replace(finished_path, target)
+            else:
+                os.replace(finished_path, target)
+            self.entries[video_id] = {
+                "path": target,
+                "size": size,
+                "sha256": sha256,
+                "last_used": time.time(),
+                "published": False,
+            }
+            self.save()
+        return target
+
+    def mark_published(self, video_id):
+        with self.lock:
+            if video_id in self.entries:
+                self.entries[video_id]["published"] = True
+                self.save()
+        self.evict()
+
+    def usage_bytes(self):
+        """Bytes on disk, counting hard-linked duplicates once."""
+        with self.lock:
+            return sum({e["sha256"]: e["size"] for e in self.entries.values()}.values())
+
+    def evict(self):
+        """Delete published videos, least recently used first, until the cache fits ``max_bytes``."""
+        evicted = []
+        with self.lock:
+            groups = {}
+            for video_id, entry in self.entries.items():
+                groups.setdefault(entry["sha256"], []).append(video_id)
+            candidates = [
+                (max(self.entries[v]["last_used"] for v in ids), sha256, ids)
+                for sha256, ids in groups.items()
+                if all(self.entries[v]["published"] for v in ids)
+            ]
+            usage = self.usage_bytes()
+            for _, sha256, ids in sorted(candidates):
+                if usage <= self.max_bytes:
+                    break
+                usage -= self.entries[ids[0]]["size"]
+                for video_id in ids:
+                    for path in glob.glob(os.path.join(self.root, f"{video_id}[._]*")):
+                        os.remove(path)
+                    del self.entries[video_id]
+                    evicted.append(video_id)
+            if evicted:
+                self.save()
+        return evicted
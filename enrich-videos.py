@@ -0,0 +1,60 @@
+import argparse
+import time
+from collections import Counter
+
+from archive_shards import load_details
+from enrichment import ENRICH_WORKERS, ENRICHMENT_DIR, Enricher
+from registry import Registry
+
+# Configuration
+CSV_DB_PATH = "zenodo_registry.csv"
+REGISTRY_DB_PATH = "zenodo_registry.db"
+TOP_TERMS = 20
+
+def backlog_videos(registry):
+    """Every registered video, with the YouTube details the uploader cached for it"""
+    details = load_details(enrichment_path=None)
+    videos = {}
+    for row in registry.published_rows() + registry.unfinished_rows():
+        youtube_id = row["youtube_id"]
+        info = details.get(youtube_id, {})
+        videos.setdefault(youtube_id, {
+            "video_id": youtube_id,
+            "url": row["youtube_link"] or f"https://www.youtube.com/watch?v={youtube_id}",
+            "title": info.get("title") or row["title"] or "",
+            "description": info.get("description", ""),
+            "tags": info.get("tags", []),
+        })
+    return list(videos.values())
+
+def print_top_terms(enricher, videos):
+    counts = Counter(term for v in videos for term in (enricher.get(v["video_id"]) or {}).get("terms", []))
+    if counts:
+        print(f"🕉️ Most common Sanskrit terms: {', '.join(t for t, _ in counts.most_common(TOP_TERMS))}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Fetch captions of archived videos and extract keywords and Sanskrit terms.")
+    parser.add_argument("--refresh", action="store_true",
+                        help="fetch captions and extract again even for videos already enriched")
+    parser.add_argument("--workers", type=int, default=ENRICH_WORKERS, help="concurrent caption downloads")
+    parser.add_argument("--limit", type=int, help="enrich at most this many videos")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    started = time.monotonic()
+    videos = backlog_videos(Registry(REGISTRY_DB_PATH, CSV_DB_PATH))
+    if args.limit is not None:
+        videos = videos[:args.limit]
+    enricher = Enricher(ENRICHMENT_DIR, workers=args.workers)
+    print(f"Enriching {len(videos)} videos...")
+    counts = enricher.enrich_all(videos, refresh=args.refresh)
+    print(f"\n🏷️ Enrichment done in {time.monotonic() - started:.1f}s: {counts['fetched']} fetched, "
+          f"{counts['from_cache']} from cached transcripts, {counts['no_captions']} without captions, "
+          f"{counts['skipped']} already enriched, {counts['failed']} failed")
+    print_top_terms(enricher, videos)
+    print(f"📝 Index in {enricher.index_path}; the uploader and the sharded archive search read it from there.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Transcript-based metadata enrichment: keywords and Sanskrit terms per video.
+
+Subtitles, or YouTube's automatic captions when a video has none, are fetched
+with yt_dlp without downloading the video and cached as
+``enrichment/transcripts/<video_id>.<lang>.<kind>.vtt``, where ``kind`` is
+``subtitles`` or ``automatic``, so a cached transcript alone tells which
+captions it came from. From the transcript, title, description and tags,
+``extract()`` derives:
+
+    keywords  the most frequent content words (folded, stop words removed)
+    terms     Sanskrit terms, spelled with diacritics where any source or the
+              glossary has them, ranked by frequency
+
+Results go to ``enrichment/index.json`` keyed by video id, including videos
+without captions, so a rerun skips every video already done. Bumping
+``EXTRACTOR_VERSION`` re-extracts from the cached transcripts without
+fetching anything again.
+
+The uploader adds the results to the Zenodo keywords and description, and
+``archive_shards`` adds them to the search index.
+"""
+import glob
+import json
+import os
+import re
+import threading
+import unicodedata
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+import yt_dlp
+
+from archive_shards import fold_text, tokenize
+
+ENRICHMENT_DIR = "enrichment"
+SUBTITLE_LANGS = ["en", "en-US", "en-GB", "hi", "sa"]
+EXTRACTOR_VERSION = 1
+ENRICH_WORKERS = 4
+MAX_KEYWORDS = 15
+MAX_TERMS = 25
+MIN_KEYWORD_COUNT = 3
+
+# Folded spelling -> IAST, for terms that captions spell without diacritics
+SANSKRIT_GLOSSARY = {
+    term: iast
+    for iast, spellings in {
+        "abhinavagupta": ["abhinavagupta"],
+        "ācārya": ["acarya", "acharya"],
+        "advaita": ["advaita"],
+        "āgama": ["agama"],
+        "ānanda": ["ananda"],
+        "bhairava": ["bhairava"],
+        "bhakti": ["bhakti"],
+        "cit": ["cit", "chit"],
+        "dharma": ["dharma"],
+        "dhyāna": ["dhyana"],
+        "guru": ["guru"],
+        "jñāna": ["jnana", "gnana", "gyana"],
+        "kāśmīra": ["kashmira"],
+        "kṣemarāja": ["kshemaraja", "ksemaraja"],
+        "kuṇḍalinī": ["kundalini"],
+        "mantra": ["mantra", "mantras"],
+        "māyā": ["maya"],
+        "mokṣa": ["moksha", "moksa"],
+        "prakāśa": ["prakasha", "prakasa"],
+        "pratyabhijñā": ["pratyabhijna", "pratyabhigna", "pratyabhijnya"],
+        "sādhanā": ["sadhana"],
+        "śaiva": ["shaiva", "saiva"],
+        "śaivism": ["shaivism", "saivism"],
+        "śakti": ["shakti", "sakti"],
+        "sāṃkhya": ["samkhya", "sankhya"],
+        "sampradāya": ["sampradaya"],
+        "saṃvit": ["samvit"],
+        "sarvāmnāya": ["sarvamnaya"],
+        "śiva": ["shiva", "siva"],
+        "somānanda": ["somananda"],
+        "spanda": ["spanda"],
+        "śrī": ["shri", "sri"],
+        "śrīvidyā": ["shrividya", "srividya"],
+        "sūtra": ["sutra", "sutras"],
+        "tantra": ["tantra", "tantras"],
+        "tantrāloka": ["tantraloka"],
+        "upaniṣad": ["upanishad", "upanisad", "upanishads"],
+        "utpaladeva": ["utpaladeva"],
+        "vasugupta": ["vasugupta"],
+        "vedānta": ["vedanta"],
+        "vimarśa": ["vimarsha", "vimarsa"],
+        "yoga": ["yoga"],
+        "yoginī": ["yogini"],
+    }.items()
+    for term in spellings
+}
+# Letters that mark a word as IAST-transliterated Sanskrit
+IAST_LETTERS = set("āīūṛṝḷḹṅñṭḍṇśṣṃḥĀĪŪṚṜḶḸṄÑṬḌṆŚṢṂḤ")
+ENGLISH_STOP_WORDS = set("""
+about above after again against all also am any because been before being below between both but can
+could did do does doing down during each few further had has have having he her here hers herself him
+himself his how i if into its itself just like me more most my myself no nor not now of off once only other
+our ours ourselves out over own same she should so some such than their theirs them themselves then there
+these they those through too under until up very was we were what when where which while who whom why
+will would you your yours yourself yourselves one two also actually really going know think say said
+says see way thing things something anything everything get got make made well yes okay right
+even because very much many us let lets come comes came go goes went take takes within without
+""".split())
+
+_VTT_TIMING = re.compile(r"^\d{1,2}:\d{2}(:\d{2})?[.,]\d{3}\s+-->")
+_VTT_TAG = re.compile(r"<[^>]+>")
+
+
+def vtt_text(vtt):
+    """Plain text of a WebVTT file. Rolling auto-caption lines are only kept once."""
+    lines = []
+    previous = None
+    for line in vtt.splitlines():
+        line = line.strip()
+        if (not line or line == "WEBVTT" or _VTT_TIMING.match(line) or line.isdigit()
+                or line.startswith(("Kind:", "Language:", "NOTE", "STYLE"))):
+            continue
+        line = _VTT_TAG.sub("", line).strip()
+        if line and line != previous:
+            lines.append(line)
+        previous = line
+    return " ".join(lines)
+
+
+def sanskrit_terms(texts):
+    """Sanskrit terms in ``texts``, most frequent first, in their diacritic spelling."""
+    counts = Counter()
+    spellings = {}
+    for text in texts:
+        for word in re.findall(r"[^\W\d_]+", unicodedata.normalize("NFC", text)):
+            folded = fold_text(word)
+            if folded in SANSKRIT_GLOSSARY:
+                counts[SANSKRIT_GLOSSARY[folded]] += 1
+            elif IAST_LETTERS.intersection(word):
+                # Spelled with diacritics but not in the glossary: keep its most common spelling
+                spellings.setdefault(folded, Counter())[word.lower()] += 1
+                counts[folded] += 1
+    return [spellings[key].most_common(1)[0][0] if key in spellings else key
+            for key, _ in counts.most_common(MAX_TERMS)]
+
+
+def extract(transcript, title="", description="", tags=()):
+    """Keywords and Sanskrit terms of one video. ``transcript`` may be empty."""
+    texts = [title, description, " ".join(tags), transcript]
+    counts = Counter(
+        token for text in texts for token in tokenize(text)
+        if token not in ENGLISH_STOP_WORDS and not token.isdigit()
+    )
+    # Title and tag words count even when rare; transcript words need MIN_KEYWORD_COUNT
+    prominent = set(tokenize(" ".join([title] + list(tags))))
+    terms = sanskrit_terms(texts)
+    # Terms are listed separately in their diacritic spelling
+    folded_terms = {fold_text(term) for term in terms} | {k for k, v in SANSKRIT_GLOSSARY.items() if v in terms}
+    keywords = [token for token, n in counts.most_common()
+                if (n >= MIN_KEYWORD_COUNT or token in prominent) and token not in folded_terms][:MAX_KEYWORDS]
+    return {"keywords": keywords, "terms": terms}
+
+
+class Enricher:
+    """Fetches and caches transcripts and keeps the enrichment index of all videos."""
+
+    def __init__(self, root=ENRICHMENT_DIR, workers=ENRICH_WORKERS):
+        self.root = root
+        self.workers = workers
+        self.transcript_dir = os.path.join(root, "transcripts")
+        self.partial_dir = os.path.join(root, ".partial")
+        self.index_path = os.path.join(root, "index.json")
+        self.lock = threading.Lock()
+        os.makedirs(self.transcript_dir, exist_ok=True)
+        os.makedirs(self.partial_dir, exist_ok=True)
+        self.entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, encoding="utf-8") as file:
+                self.entries = json.load(file)
+
+    def save(self):
+        tmp_path = f"{self.index_path}.tmp"
+        with self.lock:
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.entries, file, ensure_ascii=False, indent=1)
+            os.replace(tmp_path, self.index_path)
+
+    def get(self, video_id):
+        with self.lock:
+            entry = self.entries.get(video_id)
+            return dict(entry) if entry else None
+
+    def is_current(self, video_id):
+        entry = self.get(video_id)
+        return entry is not None and entry["version"] == EXTRACTOR_VERSION
+
+    def cached_transcript(self, video_id):
+        for path in glob.glob(os.path.join(glob.escape(self.transcript_dir), f"{glob.escape(video_id)}.*.vtt")):
+            return path
+        return None
+
+    def fetch_transcript(self, video_id, video_url):
+        """Download subtitles (preferred) or automatic captions. Returns (path or None, info dict)."""
+        outtmpl = os.path.join(self.partial_dir, f"{video_id}.%(ext)s")
+        ydl_opts = {
+            'skip_download': True,
+            'writesubtitles': True,
+            'writeautomaticsub': True,
+            'subtitleslangs': SUBTITLE_LANGS,
+            'subtitlesformat': 'vtt',
+            'outtmpl': outtmpl,
+            'quiet': True,
+            'no_warnings': True,
+        }
+        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            info = ydl.extract_info(video_url, download=True)
+
+        written = glob.glob(os.path.join(glob.escape(self.partial_dir), f"{glob.escape(video_id)}.*.vtt"))
+        if not written:
+            return None, info
+        # One file per language that had captions; take the first in SUBTITLE_LANGS order
+        by_lang = {os.path.basename(p)[len(video_id) + 1:-len(".vtt")]: p for p in written}
+        lang = next((l for l in SUBTITLE_LANGS if l in by_lang), sorted(by_lang)[0])
+        kind = "subtitles" if lang in (info.get("subtitles") or {}) else "automatic"
+        path = os.path.join(self.transcript_dir, f"{video_id}.{lang}.{kind}.vtt")
+        stale = self.cached_transcript(video_id)
+        if stale and stale != path:
+            os.remove(stale)
+        os.replace(by_lang[lang], path)
+        for leftover in written:
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        return path, info
+
+    def enrich(self, video_id, video_url, details=None, refresh=False):
+        """Enrichment of one video, from the index, the cached transcript or yt_dlp, in that order.
+
+        The returned entry has ``fetched`` set if yt_dlp was asked for captions.
+        """
+        previous = self.get(video_id)
+        if not refresh and previous and previous["version"] == EXTRACTOR_VERSION:
+            return dict(previous, fetched=False)
+        details = dict(details or {})
+        path = None if refresh else self.cached_transcript(video_id)
+        fetched = False
+        # Videos known to have no captions are only asked again with refresh
+        if path is None and (refresh or previous is None or previous["captions"]):
+            path, info = self.fetch_transcript(video_id, video_url)
+            fetched = True
+            for key in ("title", "description"):
+                details.setdefault(key, info.get(key) or "")
+            details.setdefault("tags", info.get("tags") or [])
+
+        transcript = ""
+        lang = captions = None
+        if path:
+            lang, captions = self._caption_file(video_id, path)
+            if captions is None:
+                # Cached before the kind was part of the file name
+                captions = (previous or {}).get("captions") or "automatic"
+            with open(path, encoding="utf-8") as file:
+                transcript = vtt_text(file.read())
+        entry = extract(transcript, details.get("title", ""), details.get("description", ""), details.get("tags", []))
+        entry.update({
+            "version": EXTRACTOR_VERSION,
+            "captions": captions,
+            "lang": lang,
+            "transcript_words": len(transcript.split()),
+        })
+        with self.lock:
+            self.entries[video_id] = entry
+        self.save()
+        return dict(entry, fetched=fetched)
+
+    @staticmethod
+    def _caption_file(video_id, path):
+        """(lang, kind) from a transcript file name; kind is None for the older ``<id>.<lang>.vtt``."""
+        lang, _, kind = os.path.basename(path)[len(video_id) + 1:-len(".vtt")].partition(".")
+        return lang, kind or None
+
+    def enrich_all(self, videos, refresh=False):
+        """Enrich ``videos`` (dicts with video_id, url and optional title/description/tags) in parallel.
+
+        Videos already in the index at the current version are skipped unless
+        ``refresh`` is set. Returns counts per outcome.
+        """
+        todo = [v for v in videos if refresh or not self.is_current(v["video_id"])]
+        counts = {"skipped": len(videos) - len(todo), "fetched": 0, "from_cache": 0,
+                  "no_captions": 0, "failed": 0}
+
+        def run(video):
+            try:
+                entry = self.enrich(video["video_id"], video["url"], dict(video), refresh)
+            except Exception as e:
+                print(f"⚠️ Enrichment failed for {video['video_id']}: {e}")
+                return "failed"
+            if entry["captions"] is None:
+                return "no_captions"
+            return "fetched" if entry["fetched"] else "from_cache"
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            for outcome in pool.map(run, todo):
+                counts[outcome] += 1
+        return counts
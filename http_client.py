@@ -0,0 +1,331 @@
+"""Shared HTTP client layer for the archive scripts.
+
+Every script asks for a named session (``get_session("zenodo")``) instead of
+calling ``requests.get``/``post`` directly. Sessions are created once per name
+and keep pooled keep-alive connections, a default timeout and urllib3
+retry/backoff on 5xx responses. Each request is timed per host so a run can
+end with ``print_stats()`` or ``dump_stats_at_exit()``.
+
+Every request also passes through the ``RateLimiter`` of its host
+(``get_limiter("zenodo.org")``), a token bucket shared by all sessions and
+threads of the process. The bucket adapts to the server: ``X-RateLimit-Remaining``
+and ``X-RateLimit-Reset`` set the rate that spends the remaining budget evenly
+over the window, a 429 halves the rate and pauses the host for ``Retry-After``,
+and successful calls without such headers raise the rate back step by step.
+429 responses are retried with jittered exponential backoff. urllib3 only
+retries idempotent methods after a 5xx or a read error; a POST that is safe to
+repeat (publish, edit, accept) passes ``idempotent=True`` and is retried the
+same way by the session. Time spent
+waiting for tokens or backing off is reported per host as ``throttled_seconds``.
+Observers registered with ``add_observer()`` are called after every request
+(used by ``instrumentation``); with none registered this costs one list check.
+"""
+import atexit
+import json
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+POOL_CONNECTIONS = 4
+POOL_MAXSIZE = 8
+TIMEOUT = (10, 120)  # (connect, read) seconds
+RETRIES = 5
+BACKOFF_FACTOR = 1
+RETRY_STATUSES = (500, 502, 503, 504)  # 429 is handled by the rate limiter
+THROTTLE_STATUS = 429
+MAX_BACKOFF = 300
+DEFAULT_REQUESTS_PER_SECOND = 2
+ZENODO_REQUESTS_PER_SECOND = 1  # Starting rate for Zenodo; the limiter then follows its rate-limit headers
+HOST_REQUESTS_PER_SECOND = {
+    "zenodo.org": ZENODO_REQUESTS_PER_SECOND,
+    "sandbox.zenodo.org": ZENODO_REQUESTS_PER_SECOND,
+}
+MAX_RATE_FACTOR = 4  # how far above its configured rate a limiter may speed up
+MIN_REQUESTS_PER_SECOND = 0.01
+
+
+def retry_after_seconds(response):
+    """Seconds from a ``Retry-After`` header (delta or HTTP date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def backoff_delay(attempt, retry_after=None, factor=BACKOFF_FACTOR):
+    """Full-jitter exponential backoff, never shorter than the server's ``Retry-After``."""
+    delay = random.uniform(0, min(MAX_BACKOFF, factor * 2 ** attempt))
+    return max(delay, retry_after or 0.0)
+
+
+class RateLimiter:
+    """Token bucket for one host whose rate follows the server's rate-limit feedback."""
+
+    def __init__(self, requests_per_second=DEFAULT_REQUESTS_PER_SECOND, burst=1, max_rate=None):
+        self.rate = requests_per_second
+        self.max_rate = max_rate or requests_per_second * MAX_RATE_FACTOR
+        self.step = requests_per_second / 10
+        self.capacity = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait(self):
+        """Take one token, sleeping until one is available. Returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self.blocked_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                delay = max(self.blocked_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(delay)
+            waited += delay
+
+    def update(self, response):
+        """Adjust the rate from a response's status and rate-limit headers."""
+        headers = response.headers
+        remaining = headers.get("X-RateLimit-Remaining")
+        reset = headers.get("X-RateLimit-Reset")
+        with self.lock:
+            now = time.monotonic()
+            self._refill(now)
+            if response.status_code == THROTTLE_STATUS:
+                self.rate = max(MIN_REQUESTS_PER_SECOND, self.rate / 2)
+                self.tokens = 0
+                pause = retry_after_seconds(response)
+                if pause:
+                    self.blocked_until = max(self.blocked_until, now + pause)
+            elif remaining is not None and reset is not None:
+                try:
+                    remaining, reset = int(remaining), float(reset)
+                except ValueError:
+                    return
+                # Reset is an epoch timestamp on Zenodo; small values are a delta in seconds
+                window = max(1.0, reset - time.time() if reset > 1e9 else reset)
+                if remaining <= 0:
+                    self.tokens = 0
+                    self.blocked_until = max(self.blocked_until, now + window)
+                self.rate = min(self.max_rate, max(MIN_REQUESTS_PER_SECOND, remaining / window))
+            elif response.ok:
+                self.rate = min(self.max_rate, self.rate + self.step)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+_observers = []
+
+
+def add_observer(callback):
+    """Call ``callback(host, method, status, seconds, bytes_sent, bytes_received, retries)`` after each request."""
+    _observers.append(callback)
+
+
+def remove_observer(callback):
+    if callback in _observers:
+        _observers.remove(callback)
+
+
+def _body_size(data):
+    if data is None:
+        return 0
+    try:
+        return len(data)
+    except TypeError:
+        return 0
+
+
+def _notify(host, method, response, seconds, kwargs, retries):
+    status = response.status_code if response is not None else None
+    received = 0
+    if response is not None:
+        received = int(response.headers.get("Content-Length") or 0)
+        history = getattr(getattr(response.raw, "retries", None), "history", None)
+        retries += len(history or ())
+    sent = _body_size(kwargs.get("data")) or _body_size(json.dumps(kwargs["json"]) if kwargs.get("json") else None)
+    for callback in list(_observers):
+        callback(host, method, status, seconds, sent, received, retries)
+
+
+def get_limiter(host, requests_per_second=None, **options):
+    """Return the shared limiter for ``host``, creating it with the given rate on first use.
+
+    Without a rate, hosts in ``HOST_REQUESTS_PER_SECOND`` start at theirs and others at the default.
+    """
+    with _limiters_lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            rate = requests_per_second or HOST_REQUESTS_PER_SECOND.get(host, DEFAULT_REQUESTS_PER_SECOND)
+            limiter = _limiters[host] = RateLimiter(rate, **options)
+        return limiter
+
+
+class HostStats:
+    """Thread-safe request counts and latency totals per host."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hosts = {}
+
+    def record(self, host, seconds, status):
+        with self.lock:
+            entry = self._entry(host)
+            entry["requests"] += 1
+            entry["total_seconds"] += seconds
+            entry["max_seconds"] = max(entry["max_seconds"], seconds)
+            if status is None or status >= 400:
+                entry["errors"] += 1
+
+    def _entry(self, host):
+        return self.hosts.setdefault(host, {
+            "requests": 0, "errors": 0, "total_seconds": 0.0, "max_seconds": 0.0,
+            "retries": 0, "throttled_seconds": 0.0,
+        })
+
+    def record_throttle(self, host, seconds, retry=False):
+        with self.lock:
+            entry = self._entry(host)
+            entry["throttled_seconds"] += seconds
+            if retry:
+                entry["retries"] += 1
+
+    def snapshot(self):
+        with self.lock:
+            result = {}
+            for host, entry in self.hosts.items():
+                result[host] = dict(entry)
+                result[host]["avg_seconds"] = entry["total_seconds"] / entry["requests"] if entry["requests"] else 0.0
+            return result
+
+
+stats = HostStats()
+
+
+class _ServerErrorRetry(Retry):
+    """urllib3 retries that leave 429 responses to ``PooledSession`` and the host limiter."""
+
+    RETRY_AFTER_STATUS_CODES = frozenset({503})
+
+
+class PooledSession(requests.Session):
+    """requests.Session with a default timeout, pooled adapters, per-host rate limiting and timing.
+
+    ``retries`` bounds both the urllib3 retries (connection errors, 5xx) and the
+    retries of throttled (429) responses. Requests with a streamed body are
+    never retried here, since the body cannot be sent twice. ``idempotent=True``
+    on a request also retries a POST or PATCH after a 5xx or connection error.
+    """
+
+    def __init__(self, timeout=TIMEOUT, pool_connections=POOL_CONNECTIONS,
+                 pool_maxsize=POOL_MAXSIZE, retries=RETRIES, backoff_factor=BACKOFF_FACTOR):
+        super().__init__()
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        retry = _ServerErrorRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, method, url, idempotent=False, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        host = urlsplit(url).netloc
+        limiter = get_limiter(host)
+        data = kwargs.get("data")
+        replayable = data is None or isinstance(data, (bytes, str, dict, list, tuple))
+        # Methods urllib3 does not retry itself, when the caller says repeating them is safe
+        retry_errors = idempotent and replayable and method.upper() not in Retry.DEFAULT_ALLOWED_METHODS
+        attempt = 0
+        while True:
+            waited = limiter.wait()
+            if waited:
+                stats.record_throttle(host, waited)
+            started = time.monotonic()
+            response = None
+            try:
+                response = super().request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+                if not retry_errors or attempt >= self.retries:
+                    raise
+            finally:
+                seconds = time.monotonic() - started
+                stats.record(host, seconds, response.status_code if response is not None else None)
+                if _observers:
+                    _notify(host, method, response, seconds, kwargs, attempt)
+            if response is None:
+                time.sleep(backoff_delay(attempt, factor=self.backoff_factor))
+                attempt += 1
+                continue
+            limiter.update(response)
+            server_error = retry_errors and response.status_code in RETRY_STATUSES
+            if (response.status_code != THROTTLE_STATUS and not server_error) or not replayable \
+                    or attempt >= self.retries:
+                return response
+            delay = backoff_delay(attempt, retry_after_seconds(response), self.backoff_factor)
+            if not server_error:
+                stats.record_throttle(host, delay, retry=True)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(name="default", **options):
+    """Return the shared session for ``name``, creating it with ``options`` on first use."""
+    with _sessions_lock:
+        session = _sessions.get(name)
+        if session is None:
+            session = _sessions[name] = PooledSession(**options)
+        return session
+
+
+def print_stats():
+    snapshot = stats.snapshot()
+    if not snapshot:
+        return
+    print("\n🌐 HTTP requests per host:")
+    for host, entry in sorted(snapshot.items()):
+        print(f"  {host:<30} {entry['requests']:>6} requests  {entry['errors']:>4} errors  "
+              f"avg {entry['avg_seconds']:.3f}s  max {entry['max_seconds']:.3f}s  "
+              f"{entry['retries']:>4} throttle retries  {entry['throttled_seconds']:.1f}s throttled")
+
+
+def dump_stats_at_exit(path=None):
+    """Print the per-host stats when the process exits, and write them as JSON to ``path`` if given."""
+
+    def dump():
+        print_stats()
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(stats.snapshot(), f, indent=2)
+
+    atexit.register(dump)
@@ -0,0 +1,213 @@
+"""Per-stage timing, HTTP call events and a run report for the uploader.
+
+``Instrumentation`` writes one JSON line per finished stage and per HTTP call:
+
+    {"t": 1718000000.12, "event": "stage", "stage": "upload", "video": "jZFm_UOnxv0",
+     "seconds": 84.2, "ok": true, "bytes": 734003200}
+    {"t": 1718000000.34, "event": "http", "host": "zenodo.org", "method": "POST",
+     "status": 201, "seconds": 0.61, "bytes_sent": 1893, "bytes_received": 2210, "retries": 0}
+
+and ``finish()`` writes a summary with per-stage totals and p50/p90/p99, HTTP
+totals per host, the slowest videos and, optionally, the top cProfile
+functions or tracemalloc allocation sites.
+
+When disabled (the default), ``span()`` returns a shared no-op context manager
+and no HTTP observer is registered, so instrumented code pays one attribute
+check per stage and nothing per request.
+"""
+import cProfile
+import io
+import json
+import math
+import pstats
+import threading
+import time
+import tracemalloc
+
+import http_client
+
+EVENTS_PATH = "uploader_events.jsonl"
+REPORT_PATH = "uploader_report.json"
+PROFILERS = ("cprofile", "tracemalloc")
+SLOWEST_VIDEOS = 10
+PROFILE_TOP = 25
+
+
+class _NullSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, **fields):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, owner, stage, video_id, fields):
+        self.owner = owner
+        self.stage = stage
+        self.video_id = video_id
+        self.fields = fields
+
+    def add(self, **fields):
+        """Attach fields (e.g. bytes) that are only known once the stage has run."""
+        self.fields.update(fields)
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.started
+        self.owner.stage_done(self.stage, self.video_id, seconds, exc_type is None, self.fields)
+        return False
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class Instrumentation:
+    def __init__(self):
+        self.enabled = False
+        self.lock = threading.Lock()
+
+    def start(self, events_path=EVENTS_PATH, report_path=REPORT_PATH, profiler=None):
+        """Switch instrumentation on for the rest of the run."""
+        if profiler and profiler not in PROFILERS:
+            raise ValueError(f"Unknown profiler: {profiler} (choose from {', '.join(PROFILERS)})")
+        self.events = open(events_path, "w", encoding="utf-8")
+        self.report_path = report_path
+        self.stages = {}
+        self.videos = {}
+        self.failures = {}
+        self.http = {}
+        self.started = time.perf_counter()
+        self.profiler = profiler
+        if profiler == "cprofile":
+            # cProfile sees the main thread only; worker stages still appear in the events
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+        elif profiler == "tracemalloc":
+            tracemalloc.start(10)
+        http_client.add_observer(self.http_done)
+        self.enabled = True
+
+    def span(self, stage, video_id=None, **fields):
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, stage, video_id, fields)
+
+    def _emit(self, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.events.write(line)
+
+    def stage_done(self, stage, video_id, seconds, ok, fields):
+        self._emit(dict({"t": round(time.time(), 3), "event": "stage", "stage": stage, "video": video_id,
+                         "seconds": round(seconds, 4), "ok": ok}, **fields))
+        with self.lock:
+            self.stages.setdefault(stage, []).append(seconds)
+            if not ok:
+                self.failures[stage] = self.failures.get(stage, 0) + 1
+            if video_id:
+                video = self.videos.setdefault(video_id, {"seconds": 0.0, "stages": {}})
+                video["seconds"] += seconds
+                video["stages"][stage] = round(video["stages"].get(stage, 0.0) + seconds, 4)
+
+    def http_done(self, host, method, status, seconds, bytes_sent, bytes_received, retries):
+        self._emit({"t": round(time.time(), 3), "event": "http", "host": host, "method": method, "status": status,
+                    "seconds": round(seconds, 4), "bytes_sent": bytes_sent, "bytes_received": bytes_received,
+                    "retries": retries})
+        with self.lock:
+            entry = self.http.setdefault(host, {"requests": 0, "seconds": [], "bytes_sent": 0,
+                                                "bytes_received": 0, "retries": 0})
+            entry["requests"] += 1
+            entry["seconds"].append(seconds)
+            entry["bytes_sent"] += bytes_sent
+            entry["bytes_received"] += bytes_received
+            entry["retries"] += retries
+
+    def summary(self):
+        with self.lock:
+            stages = {
+                stage: {
+                    "count": len(values),
+                    "failed": self.failures.get(stage, 0),
+                    "total_seconds": round(sum(values), 3),
+                    "p50_seconds": round(percentile(values, 0.50), 4),
+                    "p90_seconds": round(percentile(values, 0.90), 4),
+                    "p99_seconds": round(percentile(values, 0.99), 4),
+                    "max_seconds": round(max(values), 4),
+                }
+                for stage, values in self.stages.items()
+            }
+            http = {
+                host: {
+                    "requests": entry["requests"],
+                    "retries": entry["retries"],
+                    "bytes_sent": entry["bytes_sent"],
+                    "bytes_received": entry["bytes_received"],
+                    "p50_seconds": round(percentile(entry["seconds"], 0.50), 4),
+                    "p99_seconds": round(percentile(entry["seconds"], 0.99), 4),
+                }
+                for host, entry in self.http.items()
+            }
+            slowest = sorted(self.videos.items(), key=lambda item: item[1]["seconds"], reverse=True)
+            return {
+                "wall_seconds": round(time.perf_counter() - self.started, 3),
+                "stages": stages,
+                "http": http,
+                "slowest_videos": [
+                    {"video": video_id, "seconds": round(entry["seconds"], 3), "stages": entry["stages"]}
+                    for video_id, entry in slowest[:SLOWEST_VIDEOS]
+                ],
+            }
+
+    def _profile_report(self):
+        if self.profiler == "cprofile":
+            self.profile.disable()
+            out = io.StringIO()
+            pstats.Stats(self.profile, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+            return out.getvalue().splitlines()
+        if self.profiler == "tracemalloc":
+            snapshot = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            top = snapshot.statistics("lineno")[:PROFILE_TOP]
+            return {"peak_bytes": peak, "top": [str(stat) for stat in top]}
+        return None
+
+    def finish(self):
+        """Write the summary report, print the stage table and switch instrumentation off."""
+        if not self.enabled:
+            return None
+        self.enabled = False
+        http_client.remove_observer(self.http_done)
+        report = self.summary()
+        profile = self._profile_report()
+        if profile is not None:
+            report["profile"] = {"profiler": self.profiler, "result": profile}
+        with self.lock:
+            self.events.close()
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"\n⏱️ Stage timings ({report['wall_seconds']:.1f}s wall time, report in {self.report_path}):")
+        for stage, entry in report["stages"].items():
+            print(f"  {stage:<10} {entry['count']:>5}x  total {entry['total_seconds']:>8.1f}s  "
+                  f"p50 {entry['p50_seconds']:>7.2f}s  p90 {entry['p90_seconds']:>7.2f}s  "
+                  f"p99 {entry['p99_seconds']:>7.2f}s  failed {entry['failed']}")
+        for video in report["slowest_videos"][:3]:
+            print(f"  🐢 {video['video']}: {video['seconds']:.1f}s {video['stages']}")
+        return report
+
+
+instrument = Instrumentation()
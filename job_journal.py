@@ -0,0 +1,104 @@
+"""Write-ahead journal of upload pipeline stage transitions.
+
+Every stage of a video (download, deposit, upload, publish) is recorded as
+``started`` before the work happens and ``done`` after it, together with the
+deposition id and bucket URL once they are known. Each line is flushed and
+fsynced before the pipeline moves on, so after a crash or kill the journal
+shows exactly which stage every video reached and which deposition it owns:
+
+    {"t": 1718000000.0, "video": "jZFm_UOnxv0", "stage": "deposit", "status": "done",
+     "deposition_id": 15188145, "bucket_url": "https://zenodo.org/api/files/..."}
+
+A torn last line is ignored on replay. ``compact()`` rewrites the journal with
+only the videos that are not yet published.
+"""
+import json
+import os
+import threading
+import time
+
+JOURNAL_PATH = "upload_journal.jsonl"
+STAGES = ("download", "deposit", "upload", "publish")
+
+
+class JobJournal:
+    def __init__(self, path=JOURNAL_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.jobs = {}
+        if os.path.exists(path):
+            self._replay()
+        self.file = open(path, "a", encoding="utf-8")
+
+    def _replay(self):
+        with open(self.path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    event = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Torn write from a crash
+                self._apply(event)
+
+    def _apply(self, event):
+        job = self.jobs.setdefault(event["video"], {"stages": {}})
+        job["stages"][event["stage"]] = event["status"]
+        for key, value in event.items():
+            if key not in ("t", "video", "stage", "status"):
+                job[key] = value
+
+    def record(self, video_id, stage, status, **fields):
+        event = {"t": round(time.time(), 3), "video": video_id, "stage": stage, "status": status}
+        event.update(fields)
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.file.write(line)
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self._apply(event)
+
+    def started(self, video_id, stage, **fields):
+        self.record(video_id, stage, "started", **fields)
+
+    def done(self, video_id, stage, **fields):
+        self.record(video_id, stage, "done", **fields)
+
+    def job(self, video_id):
+        with self.lock:
+            job = self.jobs.get(video_id, {"stages": {}})
+            return dict(job, stages=dict(job["stages"]))
+
+    def status(self, video_id, stage):
+        with self.lock:
+            return self.jobs.get(video_id, {"stages": {}})["stages"].get(stage)
+
+    def is_done(self, video_id, stage):
+        return self.status(video_id, stage) == "done"
+
+    def unfinished(self):
+        """Video ids whose publish stage is not done."""
+        with self.lock:
+            return [v for v, job in self.jobs.items() if job["stages"].get("publish") != "done"]
+
+    def compact(self):
+        """Drop finished videos from the journal file (atomic replace)."""
+        with self.lock:
+            self.file.close()
+            self.jobs = {v: job for v, job in self.jobs.items() if job["stages"].get("publish") != "done"}
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                for video_id, job in self.jobs.items():
+                    fields = {k: v for k, v in job.items() if k != "stages"}
+                    for stage in STAGES:
+                        if stage in job["stages"]:
+                            event = {"t": round(time.time(), 3), "video": video_id, "stage": stage,
+                                     "status": job["stages"][stage]}
+                            event.update(fields)
+                            file.write(json.dumps(event, ensure_ascii=False) + "\n")
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def close(self):
+        with self.lock:
+            self.file.close()
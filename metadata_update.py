@@ -0,0 +1,70 @@
+"""Bookkeeping for re-editing the metadata of published records in bulk.
+
+Zenodo re-edits a published record in three calls: ``actions/edit`` opens it,
+a PUT replaces its metadata and ``actions/publish`` closes it again. Files are
+never touched, so an update moves a few kilobytes per record.
+
+A record needs no update when ``metadata_digest`` of its current metadata
+equals the digest of the rebuilt one. The digest covers only the fields the
+uploader sets, with keywords compared as a set. Zenodo may still return a
+managed field slightly differently from what was sent, so
+``metadata_update_state.json`` also remembers, per record, the digest that was
+sent and the digest Zenodo returned after publishing; a record whose remote
+digest is still the returned one counts as up to date with what was sent.
+
+Each record is saved to the state file as soon as it is published again, and
+a record left open by an interrupted run (``state == "inprogress"``) is
+finished without calling ``actions/edit`` a second time, so a run can be
+stopped and restarted at any point.
+"""
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+STATE_PATH = "metadata_update_state.json"
+UNORDERED_FIELDS = ("keywords",)
+
+
+def metadata_digest(metadata, fields):
+    """SHA-1 over ``fields`` of ``metadata``, ignoring keyword order."""
+    managed = {}
+    for field in fields:
+        value = metadata.get(field)
+        if field in UNORDERED_FIELDS and value:
+            value = sorted(set(value))
+        managed[field] = value
+    return hashlib.sha1(json.dumps(managed, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+class MetadataUpdateState:
+    """Digests sent and returned per record, saved after every update."""
+
+    def __init__(self, path=STATE_PATH):
+        self.path = path
+        self.lock = threading.Lock()
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as file:
+                self.records = json.load(file)
+
+    def is_current(self, record_id, wanted, remote):
+        """True if the record already carries the metadata whose digest is ``wanted``."""
+        if wanted == remote:
+            return True
+        with self.lock:
+            entry = self.records.get(str(record_id))
+        return entry is not None and entry["sent"] == wanted and entry["returned"] == remote
+
+    def done(self, record_id, sent, returned):
+        with self.lock:
+            self.records[str(record_id)] = {
+                "sent": sent,
+                "returned": returned,
+                "updated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            }
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as file:
+                json.dump(self.records, file, indent=1)
+            os.replace(tmp_path, self.path)
@@ -0,0 +1,284 @@
+"""SQLite-backed archive registry shared by all scripts.
+
+``zenodo_registry.db`` holds one row per YouTube video with unique indexes on
+``youtube_id`` and ``zenodo_id`` and a timestamp per pipeline stage
+(downloaded, deposited, uploaded, published), so a crashed run can pick each
+video up at the stage it reached. Videos that the old CSV registry archived
+twice are kept as rows flagged ``duplicate`` so the CSV round-trips; they are
+excluded from the ``youtube_id`` unique index and from lookups.
+
+``zenodo_registry.csv`` stays the published, human-readable record: it is
+imported into the database when it is newer than the last import and exported
+again with ``export_csv()``. Hand edits win: an import applies changed rows and
+drops published rows deleted from the CSV, and an export first imports a CSV
+edited since the last import or export, so it never overwrites those edits.
+"""
+import csv
+import os
+import sqlite3
+import threading
+from datetime import datetime, timezone
+
+DB_PATH = "zenodo_registry.db"
+CSV_PATH = "zenodo_registry.csv"
+CSV_COLUMNS = ["id", "youtube_id", "zenodo_id", "title", "doi", "zenodo_link", "youtube_link"]
+EDITABLE_COLUMNS = ["id", "youtube_id", "title", "doi", "zenodo_link", "youtube_link"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    pk            INTEGER PRIMARY KEY,
+    id            INTEGER,
+    youtube_id    TEXT NOT NULL,
+    zenodo_id     INTEGER UNIQUE,
+    title         TEXT,
+    doi           TEXT,
+    zenodo_link   TEXT,
+    youtube_link  TEXT,
+    file_path     TEXT,
+    bucket_url    TEXT,
+    downloaded_at TEXT,
+    deposited_at  TEXT,
+    uploaded_at   TEXT,
+    published_at  TEXT,
+    duplicate     INTEGER NOT NULL DEFAULT 0
+);
+CREATE UNIQUE INDEX IF NOT EXISTS videos_youtube_id ON videos (youtube_id) WHERE duplicate = 0;
+CREATE INDEX IF NOT EXISTS videos_id ON videos (id);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class Registry:
+    """Thread-safe access to the registry database. One instance per process is enough."""
+
+    def __init__(self, db_path=DB_PATH, csv_path=CSV_PATH):
+        self.db_path = db_path
+        self.csv_path = csv_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+        self.import_csv()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _transaction(self):
+        return Transaction(self)
+
+    # ---------------- CSV compatibility ----------------
+    def _meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else None
+
+    def _set_meta(self, key, value):
+        self.conn.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, str(value)),
+        )
+
+    def import_csv(self):
+        """Apply the CSV to the database: new rows are inserted, edited rows updated and
+        published rows missing from the CSV deleted. Skipped if the CSV has not changed.
+
+        Returns ``{"inserted", "updated", "removed"}`` counts.
+        """
+        counts = {"inserted": 0, "updated": 0, "removed": 0}
+        if not os.path.exists(self.csv_path):
+            return counts
+        mtime = str(os.path.getmtime(self.csv_path))
+        with self._transaction():
+            if self._meta("csv_mtime") == mtime:
+                return counts
+            with open(self.csv_path, newline="", encoding="utf-8") as file:
+                rows = list(csv.DictReader(file))
+            existing = {r["zenodo_id"]: dict(r) for r in
+                        self.conn.execute("SELECT * FROM videos WHERE zenodo_id IS NOT NULL")}
+            known_youtube = {r[0] for r in self.conn.execute("SELECT youtube_id FROM videos WHERE duplicate = 0")}
+            in_csv = set()
+            for r in rows:
+                zenodo_id = int(r["zenodo_id"])
+                in_csv.add(zenodo_id)
+                values = [int(r["id"]), r["youtube_id"], r["title"], r["doi"], r["zenodo_link"], r["youtube_link"]]
+                old = existing.get(zenodo_id)
+                if old is None:
+                    self.conn.execute(
+                        "INSERT INTO videos (id, youtube_id, zenodo_id, title, doi, zenodo_link, youtube_link, "
+                        "published_at, duplicate) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        values[:2] + [zenodo_id] + values[2:] + [_now(), int(r["youtube_id"] in known_youtube)],
+                    )
+                    known_youtube.add(r["youtube_id"])
+                    counts["inserted"] += 1
+                    continue
+                # The CSV holds every value as text, and NULL as an empty cell
+                if [("" if old[c] is None else str(old[c])) for c in EDITABLE_COLUMNS] == [str(v) for v in values]:
+                    continue
+                duplicate = old["duplicate"]
+                if r["youtube_id"] != old["youtube_id"]:
+                    duplicate = int(self.conn.execute(
+                        "SELECT 1 FROM videos WHERE youtube_id = ? AND duplicate = 0 AND zenodo_id != ?",
+                        (r["youtube_id"], zenodo_id),
+                    ).fetchone() is not None)
+                    known_youtube.add(r["youtube_id"])
+                self.conn.execute(
+                    "UPDATE videos SET id = ?, youtube_id = ?, title = ?, doi = ?, zenodo_link = ?, youtube_link = ?, "
+                    "duplicate = ? WHERE zenodo_id = ?",
+                    values + [duplicate, zenodo_id],
+                )
+                counts["updated"] += 1
+            # Only published rows are exported, so only those can have been deleted by hand
+            removed = [old for zenodo_id, old in existing.items()
+                       if old["published_at"] and zenodo_id not in in_csv]
+            for old in removed:
+                self.conn.execute("DELETE FROM videos WHERE zenodo_id = ?", (old["zenodo_id"],))
+                print(f"⚠️ Registry: {old['youtube_id']} (record {old['zenodo_id']}) was deleted from "
+                      f"{self.csv_path}; the next sync will offer the video for upload again")
+            counts["removed"] = len(removed)
+            if counts["updated"]:
+                print(f"📝 Registry: applied {counts['updated']} row(s) edited in {self.csv_path}")
+            self._set_meta("csv_mtime", mtime)
+            return counts
+
+    def export_csv(self, path=None):
+        """Write all published rows to the CSV in the original column layout (atomic replace)."""
+        path = path or self.csv_path
+        tmp_path = f"{path}.tmp"
+        if path == self.csv_path:
+            # Pick up edits made to the CSV since it was last read or written
+            self.import_csv()
+        with self.lock:
+            rows = self.published_rows()
+            with open(tmp_path, "w", newline="", encoding="utf-8") as file:
+                writer = csv.writer(file)
+                writer.writerow(CSV_COLUMNS)
+                for row in rows:
+                    writer.writerow([row[c] for c in CSV_COLUMNS])
+            os.replace(tmp_path, path)
+            if path == self.csv_path:
+                with self._transaction():
+                    self._set_meta("csv_mtime", os.path.getmtime(path))
+        return len(rows)
+
+    # ---------------- Lookups ----------------
+    def get(self, youtube_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT * FROM videos WHERE youtube_id = ? AND duplicate = 0", (youtube_id,)
+            ).fetchone()
+        return dict(row) if row else None
+
+    def get_by_zenodo_id(self, zenodo_id):
+        with self.lock:
+            row = self.conn.execute("SELECT * FROM videos WHERE zenodo_id = ?", (int(zenodo_id),)).fetchone()
+        return dict(row) if row else None
+
+    def is_published(self, youtube_id):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT 1 FROM videos WHERE youtube_id = ? AND duplicate = 0 AND published_at IS NOT NULL",
+                (youtube_id,),
+            ).fetchone()
+        return row is not None
+
+    def published_youtube_ids(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT youtube_id FROM videos WHERE published_at IS NOT NULL")
+            return {r["youtube_id"] for r in rows}
+
+    def zenodo_ids(self):
+        """All deposition ids the registry knows, published or still in progress."""
+        with self.lock:
+            rows = self.conn.execute("SELECT zenodo_id FROM videos WHERE zenodo_id IS NOT NULL")
+            return {r["zenodo_id"] for r in rows}
+
+    def published_rows(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM videos WHERE published_at IS NOT NULL ORDER BY published_at, pk")
+            return [dict(r) for r in rows]
+
+    def unfinished_rows(self):
+        """Rows that reached some stage but were never published."""
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM videos WHERE published_at IS NULL")
+            return [dict(r) for r in rows]
+
+    # ---------------- Stage transitions ----------------
+    def mark_downloaded(self, youtube_id, title, youtube_link, file_path):
+        with self._transaction():
+            self.conn.execute(
+                "INSERT INTO videos (youtube_id, title, youtube_link, file_path, downloaded_at) "
+                "VALUES (?, ?, ?, ?, ?) ON CONFLICT(youtube_id) WHERE duplicate = 0 DO UPDATE SET "
+                "title = excluded.title, youtube_link = excluded.youtube_link, "
+                "file_path = excluded.file_path, downloaded_at = excluded.downloaded_at",
+                (youtube_id, title, youtube_link, file_path, _now()),
+            )
+
+    def mark_deposited(self, youtube_id, zenodo_id, bucket_url):
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE videos SET zenodo_id = ?, bucket_url = ?, deposited_at = ?, uploaded_at = NULL "
+                "WHERE youtube_id = ? AND duplicate = 0",
+                (int(zenodo_id), bucket_url, _now(), youtube_id),
+            )
+
+    def clear_deposition(self, youtube_id):
+        """Forget the draft of an unpublished video, e.g. after it was deleted on Zenodo."""
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE videos SET zenodo_id = NULL, bucket_url = NULL, deposited_at = NULL, uploaded_at = NULL "
+                "WHERE youtube_id = ? AND duplicate = 0 AND published_at IS NULL",
+                (youtube_id,),
+            )
+
+    def mark_uploaded(self, youtube_id):
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE videos SET uploaded_at = ? WHERE youtube_id = ? AND duplicate = 0", (_now(), youtube_id)
+            )
+
+    def mark_published(self, youtube_id, doi):
+        """Record the DOI and give the row the next registry ``id``. Returns that id."""
+        with self._transaction():
+            row = self.conn.execute(
+                "SELECT zenodo_id, id FROM videos WHERE youtube_id = ? AND duplicate = 0", (youtube_id,)
+            ).fetchone()
+            if row["id"] is not None:
+                return row["id"]
+            next_id = self.conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM videos").fetchone()[0]
+            self.conn.execute(
+                "UPDATE videos SET id = ?, doi = ?, zenodo_link = ?, published_at = ? "
+                "WHERE youtube_id = ? AND duplicate = 0",
+                (next_id, doi, f"https://zenodo.org/record/{row['zenodo_id']}", _now(), youtube_id),
+            )
+            return next_id
+
+
+class Transaction:
+    """``with`` block holding ``store.lock`` inside a BEGIN IMMEDIATE ... COMMIT on ``store.conn``.
+
+    Works for any object with an autocommit ``conn`` and a ``lock`` (the registry, the upload queue).
+    """
+
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        self.store.lock.acquire()
+        self.store.conn.execute("BEGIN IMMEDIATE")
+        return self.store.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.store.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        finally:
+            self.store.lock.release()
+        return False
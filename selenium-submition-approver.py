@@ -3,14 +3,11 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
 from selenium.webdriver.chrome.options import Options
 import time
-COLLECTION_URL = "https://zenodo.org/communities/sarvamnaya-oral-tradition-archive/curate"
 
+# Browser fallback for zenodo-community-approver.py (run it with --selenium)
+COLLECTION_URL = "https://zenodo.org/communities/sarvamnaya-oral-tradition-archive/curate"
 
 
-# === SETUP DRIVER ===
-options = Options()
-options.add_argument("--start-maximized")
-driver = webdriver.Chrome(options=options)  # Ensure chromedriver is in PATH
 
 # === 1. Log into Zenodo ===
 def login():
@@ -62,7 +59,13 @@ def approve_submissions():
         time.sleep(4)
 
 # === MAIN ===
-login()
-approve_submissions()
+if __name__ == "__main__":
+    # === SETUP DRIVER ===
+    options = Options()
+    options.add_argument("--start-maximized")
+    driver = webdriver.Chrome(options=options)  # Ensure chromedriver is in PATH
+
+    login()
+    approve_submissions()
 
-driver.quit()
+    driver.quit()
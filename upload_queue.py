@@ -0,0 +1,191 @@
+"""Persistent priority queue of videos waiting to be archived, for unattended runs.
+
+``upload_queue.db`` holds one row per video with its status:
+
+    pending   listed by a sync, waiting for approval (the batch preview)
+    approved  will be uploaded by the next scheduled run
+    running   taken by a run; reset to approved if that run died
+    done      published
+    failed    last attempt failed; retried until ``MAX_ATTEMPTS``
+    declined  rejected in the batch preview; not listed again
+
+Approved videos are taken in the configured order: explicit ``priority``
+(highest first), then ``published`` date (oldest first) or ``size``
+(smallest first). Each status change is its own transaction, so the queue is
+checkpointed after every item.
+
+Bytes archived are counted per day, so a run can stop at a daily bandwidth
+budget, and ``in_window()`` tells whether the local time is inside one of the
+configured upload windows.
+"""
+import sqlite3
+import threading
+from datetime import date, datetime, timedelta, timezone
+
+from registry import Transaction
+
+DB_PATH = "upload_queue.db"
+ORDERS = {
+    "priority": "priority DESC, published_at ASC",
+    "published": "published_at ASC, priority DESC",
+    "size": "size_bytes IS NULL, size_bytes ASC, priority DESC, published_at ASC",
+}
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS queue (
+    youtube_id   TEXT PRIMARY KEY,
+    title        TEXT,
+    published_at TEXT,
+    size_bytes   INTEGER,
+    priority     INTEGER NOT NULL DEFAULT 0,
+    status       TEXT NOT NULL DEFAULT 'pending',
+    attempts     INTEGER NOT NULL DEFAULT 0,
+    last_error   TEXT,
+    added_at     TEXT,
+    updated_at   TEXT
+);
+CREATE INDEX IF NOT EXISTS queue_status ON queue (status);
+CREATE TABLE IF NOT EXISTS usage (
+    day   TEXT PRIMARY KEY,
+    bytes INTEGER NOT NULL DEFAULT 0,
+    items INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def parse_window(text):
+    """'01:00-06:30' -> (time(1, 0), time(6, 30)). A window may wrap past midnight."""
+    start, end = text.split("-")
+    return (datetime.strptime(start.strip(), "%H:%M").time(), datetime.strptime(end.strip(), "%H:%M").time())
+
+
+def in_window(windows, now=None):
+    """True if ``now`` (local time) falls in one of ``windows``; no windows means always."""
+    if not windows:
+        return True
+    now = (now or datetime.now()).time()
+    for start, end in windows:
+        if start <= end and start <= now < end:
+            return True
+        if start > end and (now >= start or now < end):
+            return True
+    return False
+
+
+def seconds_until_window(windows, now=None):
+    """Seconds until the next window opens (0 if one is open now)."""
+    now = now or datetime.now()
+    if in_window(windows, now):
+        return 0
+    waits = []
+    for start, _ in windows:
+        opening = datetime.combine(now.date(), start)
+        if opening <= now:
+            opening += timedelta(days=1)
+        waits.append((opening - now).total_seconds())
+    return min(waits)
+
+
+class UploadQueue:
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def _transaction(self):
+        return Transaction(self)
+
+    def add(self, videos, status="pending"):
+        """Queue videos not queued yet. Returns how many were added."""
+        added = 0
+        with self._transaction():
+            for v in videos:
+                cursor = self.conn.execute(
+                    "INSERT INTO queue (youtube_id, title, published_at, size_bytes, status, added_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) ON CONFLICT(youtube_id) DO NOTHING",
+                    (v["video_id"], v.get("title"), v.get("published_at"), v.get("size_bytes"), status,
+                     _now(), _now()),
+                )
+                added += cursor.rowcount
+        return added
+
+    def set_status(self, youtube_ids, status):
+        with self._transaction():
+            for youtube_id in youtube_ids:
+                self.conn.execute("UPDATE queue SET status = ?, updated_at = ? WHERE youtube_id = ?",
+                                  (status, _now(), youtube_id))
+
+    def set_priority(self, youtube_id, priority):
+        with self._transaction():
+            cursor = self.conn.execute("UPDATE queue SET priority = ?, updated_at = ? WHERE youtube_id = ?",
+                                       (int(priority), _now(), youtube_id))
+            return cursor.rowcount == 1
+
+    def rows(self, status):
+        with self.lock:
+            rows = self.conn.execute("SELECT * FROM queue WHERE status = ? ORDER BY added_at", (status,))
+            return [dict(r) for r in rows]
+
+    def recover(self):
+        """Return items a dead run left ``running`` to ``approved``. Returns how many."""
+        with self._transaction():
+            return self.conn.execute(
+                "UPDATE queue SET status = 'approved', updated_at = ? WHERE status = 'running'", (_now(),)
+            ).rowcount
+
+    def take(self, order="priority"):
+        """Mark the next approved (or retryable failed) item running and return it, or None."""
+        with self._transaction():
+            row = self.conn.execute(
+                f"SELECT * FROM queue WHERE status = 'approved' OR (status = 'failed' AND attempts < ?) "
+                f"ORDER BY status = 'failed', {ORDERS[order]} LIMIT 1",
+                (MAX_ATTEMPTS,),
+            ).fetchone()
+            if row is None:
+                return None
+            self.conn.execute(
+                "UPDATE queue SET status = 'running', attempts = attempts + 1, updated_at = ? WHERE youtube_id = ?",
+                (_now(), row["youtube_id"]),
+            )
+            return dict(row)
+
+    def finish(self, youtube_id, ok, bytes_sent=0, error=None):
+        """Checkpoint one item and add its bytes to today's usage."""
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE queue SET status = ?, last_error = ?, updated_at = ? WHERE youtube_id = ?",
+                ("done" if ok else "failed", error, _now(), youtube_id),
+            )
+            self.conn.execute(
+                "INSERT INTO usage (day, bytes, items) VALUES (?, ?, 1) "
+                "ON CONFLICT(day) DO UPDATE SET bytes = bytes + excluded.bytes, items = items + 1",
+                (date.today().isoformat(), bytes_sent),
+            )
+
+    def bytes_today(self):
+        with self.lock:
+            row = self.conn.execute("SELECT bytes FROM usage WHERE day = ?", (date.today().isoformat(),)).fetchone()
+            return row["bytes"] if row else 0
+
+    def counts(self):
+        with self.lock:
+            rows = self.conn.execute("SELECT status, COUNT(*) AS n, SUM(size_bytes) AS bytes FROM queue GROUP BY status")
+            return {r["status"]: {"items": r["n"], "known_bytes": r["bytes"] or 0} for r in rows}
+
+    def upcoming(self, order="priority", limit=10):
+        """The items ``take()`` would hand out next, in order (``limit=-1`` for all)."""
+        with self.lock:
+            rows = self.conn.execute(
+                f"SELECT * FROM queue WHERE status = 'approved' OR (status = 'failed' AND attempts < ?) "
+                f"ORDER BY status = 'failed', {ORDERS[order]} LIMIT ?",
+                (MAX_ATTEMPTS, limit),
+            )
+            return [dict(r) for r in rows]
@@ -0,0 +1,120 @@
+import argparse
+import runpy
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+
+from http_client import ZENODO_REQUESTS_PER_SECOND, get_limiter, get_session, dump_stats_at_exit
+
+# Configuration
+ZENODO_API = "https://zenodo.org/api"  # Point at a local mock or the sandbox when testing
+COMMUNITY = "sarvamnaya-oral-tradition-archive"
+PAGE_SIZE = 100
+ACCEPT_WORKERS = 4
+SELENIUM_SCRIPT = "selenium-submition-approver.py"
+
+session = get_session("zenodo", pool_maxsize=ACCEPT_WORKERS)
+
+def auth_headers():
+    return {"Authorization": f"Bearer {ZENODO_TOKEN}"}
+
+def get_community_id(api_url, community):
+    """Resolve a community slug to its id"""
+    response = session.get(f"{api_url}/communities/{community}", headers=auth_headers())
+    response.raise_for_status()
+    return response.json()["id"]
+
+def get_open_requests(api_url, community_id, page_size=PAGE_SIZE):
+    """Retrieve every open request addressed to the community, page by page"""
+    found = []
+    url = f"{api_url}/communities/{community_id}/requests"
+    params = {"is_open": "true", "size": page_size, "page": 1, "sort": "oldest"}
+    page = 1
+
+    while url:
+        response = session.get(url, headers=auth_headers(), params=params)
+        response.raise_for_status()
+        body = response.json()
+        hits = body["hits"]["hits"]
+        found.extend(hits)
+        print(f"   page {page}: {len(hits)} requests")
+        if not hits or len(found) >= body["hits"].get("total", 0):
+            break
+        # The next link already carries the query string
+        url, params = body.get("links", {}).get("next"), None
+        page += 1
+
+    return found
+
+def accept_request(api_url, request):
+    """Accept one request. Returns (request, error or None)"""
+    url = f"{api_url}/requests/{request['id']}/actions/accept"
+    payload = {"payload": {"content": "Accepted into the Sarvāmnāya Oral Tradition Archive.", "format": "html"}}
+    try:
+        response = session.post(url, json=payload, headers=auth_headers(), idempotent=True)
+    except requests.exceptions.RequestException as e:
+        return request, str(e)
+    if not response.ok:
+        return request, f"{response.status_code} - {response.text[:200]}"
+    return request, None
+
+def approve_all(api_url, community, workers=ACCEPT_WORKERS, dry_run=False):
+    """Accept every open submission request of ``community``. Returns a summary dict"""
+    started = time.monotonic()
+    community_id = get_community_id(api_url, community)
+    print(f"Fetching open requests for {community} ({community_id})...")
+    pending = get_open_requests(api_url, community_id)
+    submissions = [r for r in pending if r.get("type") in ("community-submission", "community-inclusion")]
+    skipped = len(pending) - len(submissions)
+    summary = {"open": len(pending), "skipped": skipped, "accepted": 0, "failed": []}
+
+    if dry_run:
+        for request in submissions:
+            print(f"• {request['id']}: {request.get('title', 'Untitled')}")
+        print(f"\nDry run: {len(submissions)} requests would be accepted.")
+        return summary
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for request, error in pool.map(lambda r: accept_request(api_url, r), submissions):
+            if error:
+                print(f"⚠️ Failed to accept {request['id']} ({request.get('title', 'Untitled')}): {error}")
+                summary["failed"].append(request["id"])
+            else:
+                print(f"✔️ Accepted: {request.get('title', 'Untitled')}")
+                summary["accepted"] += 1
+
+    summary["seconds"] = round(time.monotonic() - started, 1)
+    return summary
+
+def print_summary(summary):
+    print(f"\n📋 {summary['open']} open requests: {summary['accepted']} accepted, "
+          f"{len(summary['failed'])} failed, {summary['skipped']} of other types left alone"
+          + (f" ({summary['seconds']}s)" if "seconds" in summary else ""))
+    if summary["failed"]:
+        print(f"Failed: {', '.join(str(i) for i in summary['failed'])}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Accept pending Zenodo community submissions through the REST API.")
+    parser.add_argument("--community", default=COMMUNITY)
+    parser.add_argument("--api-url", default=ZENODO_API, help="Zenodo API base URL, e.g. a local mock")
+    parser.add_argument("--workers", type=int, default=ACCEPT_WORKERS, help="concurrent accept calls")
+    parser.add_argument("--dry-run", action="store_true", help="only list the requests that would be accepted")
+    parser.add_argument("--selenium", action="store_true",
+                        help=f"fall back to the browser-driven {SELENIUM_SCRIPT} (needs selenium and chromedriver)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if args.selenium:
+        runpy.run_path(SELENIUM_SCRIPT, run_name="__main__")
+        return
+
+    dump_stats_at_exit()
+    # --api-url may point at another host; it gets Zenodo's starting rate as well
+    get_limiter(urlsplit(args.api_url).netloc, ZENODO_REQUESTS_PER_SECOND)
+    print_summary(approve_all(args.api_url, args.community, args.workers, args.dry_run))
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,37 @@
-
+import argparse
+import json
+import re
 import requests
-from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timezone
+
+from http_client import get_session, dump_stats_at_exit
+from registry import Registry
+from zenodo_depositions import list_depositions
 
 # Configuration
 ZENODO_API_URL = "https://zenodo.org/api/deposit/depositions"  # Use sandbox if testing
+CSV_DB_PATH = "zenodo_registry.csv"
+REGISTRY_DB_PATH = "zenodo_registry.db"
+PAGE_SIZE = 100
+DELETE_WORKERS = 4
 
-def get_all_drafts():
-    """Retrieve all draft depositions"""
-    headers = {"Authorization": f"Bearer {ZENODO_API_TOKEN}"}
-    params = {"status": "draft"}
-    
-    try:
-        response = requests.get(ZENODO_API_URL, headers=headers, params=params)
-        response.raise_for_status()
-        return response.json()
-    except requests.exceptions.RequestException as e:
-        print(f"Error fetching drafts: {e}")
-        return []
+session = get_session("zenodo", pool_maxsize=DELETE_WORKERS)
+
+def get_all_drafts(page_size=PAGE_SIZE):
+    """Retrieve all draft depositions, page by page. A failed page raises, since a
+    partial list must not be mistaken for all drafts."""
+    drafts = list(list_depositions(session, ZENODO_API_URL, ZENODO_API_TOKEN, "draft", page_size).values())
+    print(f"   {len(drafts)} drafts")
+    return drafts
 
 def delete_deposition(deposition_id):
     """Delete a single deposition"""
     headers = {"Authorization": f"Bearer {ZENODO_API_TOKEN}"}
     url = f"{ZENODO_API_URL}/{deposition_id}"
-    
+
     try:
-        response = requests.delete(url, headers=headers)
+        response = session.delete(url, headers=headers)
         if response.status_code == 204:
             print(f"✅ Successfully deleted deposition {deposition_id}")
             return True
@@ -35,48 +42,141 @@ def delete_deposition(deposition_id):
         print(f"❌ Error deleting deposition {deposition_id}: {e}")
         return False
 
+def created_date(draft):
+    return datetime.strptime(draft['created'], '%Y-%m-%dT%H:%M:%S.%f%z').date()
+
+def draft_title(draft):
+    return draft.get('metadata', {}).get('title', 'Untitled')
+
 def filter_today_drafts(drafts):
     """Filter drafts created today"""
     today = datetime.now(timezone.utc).date()
-    today_drafts = []
-    
+    return filter_drafts(drafts, created_from=today, created_to=today)
+
+def filter_drafts(drafts, created_from=None, created_to=None, title_pattern=None, registered=None):
+    """Select drafts created in [created_from, created_to] whose title matches ``title_pattern``.
+
+    With ``registered`` (a set of deposition ids), only drafts outside it are selected.
+    """
+    title_re = re.compile(title_pattern, re.IGNORECASE) if title_pattern else None
+    selected = []
+
     for draft in drafts:
-        created = datetime.strptime(draft['created'], '%Y-%m-%dT%H:%M:%S.%f%z').date()
-        if created == today:
-            today_drafts.append(draft)
-    
-    return today_drafts
+        created = created_date(draft)
+        if created_from and created < created_from:
+            continue
+        if created_to and created > created_to:
+            continue
+        if title_re and not title_re.search(draft_title(draft)):
+            continue
+        if registered is not None and draft['id'] in registered:
+            continue
+        selected.append(draft)
+
+    return selected
+
+def delete_drafts(drafts, workers=DELETE_WORKERS):
+    """Delete drafts concurrently. Returns (deleted_ids, failed_ids)."""
+    ids = [draft['id'] for draft in drafts]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(delete_deposition, ids))
+    deleted = [i for i, ok in zip(ids, results) if ok]
+    failed = [i for i, ok in zip(ids, results) if not ok]
+    return deleted, failed
+
+def write_report(path, selected, protected, deleted=None, failed=None, dry_run=False):
+    def entry(draft):
+        return {"id": draft['id'], "created": draft['created'], "title": draft_title(draft)}
+
+    report = {
+        "dry_run": dry_run,
+        "selected": [entry(d) for d in selected],
+        "protected": [entry(d) for d in protected],
+        "deleted": deleted or [],
+        "failed": failed or [],
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📝 Report written to {path}")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Delete Zenodo draft depositions. Without filters, only drafts created today are selected. "
+                    "Drafts tied to a registry row are always kept.")
+    parser.add_argument("--from", dest="created_from", type=date.fromisoformat,
+                        help="select drafts created on or after this date (YYYY-MM-DD)")
+    parser.add_argument("--to", dest="created_to", type=date.fromisoformat,
+                        help="select drafts created on or before this date (YYYY-MM-DD)")
+    parser.add_argument("--title", help="select drafts whose title matches this regular expression")
+    parser.add_argument("--unregistered", action="store_true",
+                        help="select drafts that have no row in the registry, whatever their date "
+                             "(combine with --from/--to/--title to narrow it)")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be deleted")
+    parser.add_argument("--yes", action="store_true", help="do not ask for confirmation")
+    parser.add_argument("--workers", type=int, default=DELETE_WORKERS, help="concurrent deletions")
+    parser.add_argument("--report", help="write the selected, protected, deleted and failed drafts to this JSON file")
+    return parser.parse_args()
 
 def main():
+    args = parse_args()
+    dump_stats_at_exit()
+    # --unregistered lifts the default "created today" selection; the registry check below does the rest
+    bulk = args.created_from or args.created_to or args.title or args.unregistered
+
     print("Fetching all draft depositions...")
-    drafts = get_all_drafts()
-    
+    try:
+        drafts = get_all_drafts()
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error fetching drafts, nothing deleted: {e}")
+        raise SystemExit(1)
+
     if not drafts:
         print("No draft depositions found.")
         return
-    
-    today_drafts = filter_today_drafts(drafts)
-    
-    if not today_drafts:
-        print("No draft depositions created today found.")
+
+    if bulk:
+        selected = filter_drafts(drafts, args.created_from, args.created_to, args.title)
+    else:
+        selected = filter_today_drafts(drafts)
+
+    # Drafts the registry (and so zenodo_registry.csv) knows about belong to uploads
+    # that can still be resumed, and are never deleted
+    registered = Registry(REGISTRY_DB_PATH, CSV_DB_PATH).zenodo_ids()
+    protected = [d for d in selected if d['id'] in registered]
+    selected = filter_drafts(selected, registered=registered)
+    for draft in protected:
+        print(f"🔒 Keeping draft {draft['id']}: tied to a registry row")
+
+    if not selected:
+        print("No matching draft depositions found." if bulk else "No draft depositions created today found.")
+        if args.report:
+            write_report(args.report, selected, protected, dry_run=args.dry_run)
         return
-    
-    print(f"Found {len(today_drafts)} draft depositions created today:")
-    for i, draft in enumerate(today_drafts, 1):
-        print(f"{i}. ID: {draft['id']} - Created: {draft['created']} - Title: {draft.get('metadata', {}).get('title', 'Untitled')}")
-    
-    confirmation = input("\nAre you sure you want to delete ALL these drafts created today? (y/n): ").strip().lower()
-    if confirmation != 'y':
-        print("Operation cancelled.")
+
+    print(f"Found {len(selected)} of {len(drafts)} draft depositions to delete:")
+    for i, draft in enumerate(selected, 1):
+        print(f"{i}. ID: {draft['id']} - Created: {draft['created']} - Title: {draft_title(draft)}")
+
+    if args.dry_run:
+        print(f"\nDry run: {len(selected)} drafts would be deleted, {len(protected)} kept for registry rows.")
+        if args.report:
+            write_report(args.report, selected, protected, dry_run=True)
         return
-    
-    print("\nDeleting today's drafts...")
-    success_count = 0
-    for draft in today_drafts:
-        if delete_deposition(draft['id']):
-            success_count += 1
-    
-    print(f"\nDeletion process completed. Successfully deleted {success_count} out of {len(today_drafts)} drafts.")
+
+    if not args.yes:
+        confirmation = input(f"\nAre you sure you want to delete these {len(selected)} drafts? (y/n): ").strip().lower()
+        if confirmation != 'y':
+            print("Operation cancelled.")
+            return
+
+    print(f"\nDeleting drafts with {args.workers} workers...")
+    deleted, failed = delete_drafts(selected, args.workers)
+
+    print(f"\nDeletion process completed. Successfully deleted {len(deleted)} out of {len(selected)} drafts.")
+    if failed:
+        print(f"Failed: {', '.join(str(i) for i in failed)}")
+    if args.report:
+        write_report(args.report, selected, protected, deleted, failed)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,231 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+import requests
+
+from download_cache import DownloadCache
+from http_client import get_session, dump_stats_at_exit
+from registry import Registry
+from zenodo_depositions import list_depositions
+
+# Configuration
+ZENODO_API_URL = "https://zenodo.org/api/deposit/depositions"  # Use sandbox if testing
+RECORDS_API_URL = "https://zenodo.org/api/records"
+CSV_DB_PATH = "zenodo_registry.csv"
+REGISTRY_DB_PATH = "zenodo_registry.db"
+DOWNLOAD_DIR = "downloaded_videos"
+CACHE_PATH = "registry_verify_cache.json"
+REPORT_PATH = "registry_verify_report.json"
+CACHE_MAX_AGE_HOURS = 24  # Reuse the deposition listing of a run this recent
+PAGE_SIZE = 100
+FETCH_WORKERS = 4
+HASH_WORKERS = 2
+HASH_CHUNK_SIZE = 8 * 1024 * 1024
+
+session = get_session("zenodo", pool_maxsize=FETCH_WORKERS)
+
+def auth_headers():
+    return {"Authorization": f"Bearer {ZENODO_API_TOKEN}"}
+
+# ---------------- Fetching ----------------
+def youtube_id_of(metadata):
+    """The YouTube video a deposition archives, from its isIdenticalTo link or description"""
+    links = [r.get("identifier", "") for r in metadata.get("related_identifiers", [])
+             if r.get("relation") == "isIdenticalTo"]
+    for link in links + re.findall(r"https?://\S+", metadata.get("description", "")):
+        parts = urlsplit(link)
+        if "youtube.com" in parts.netloc:
+            video_id = parse_qs(parts.query).get("v")
+            if video_id:
+                return video_id[0]
+        elif parts.netloc == "youtu.be":
+            return parts.path.strip("/")
+    return None
+
+def summarize(deposition):
+    """The fields the checks need, from a deposition (deposit API) or a record (records API)"""
+    metadata = deposition.get("metadata", {})
+    files = []
+    for f in deposition.get("files", []):
+        checksum = f.get("checksum", "")
+        files.append({
+            "name": f.get("filename") or f.get("key"),
+            "size": f.get("filesize", f.get("size")),
+            "md5": checksum.split(":", 1)[1] if checksum.startswith("md5:") else checksum,
+        })
+    return {
+        "id": deposition["id"],
+        "doi": deposition.get("doi") or metadata.get("doi") or "",
+        "published": deposition.get("submitted", True),
+        "title": metadata.get("title", "Untitled"),
+        "youtube_id": youtube_id_of(metadata),
+        "files": files,
+    }
+
+def fetch_record(record_id):
+    """Look up one record outside the listing. Returns (id, summary or None if it does not resolve)"""
+    response = session.get(f"{RECORDS_API_URL}/{record_id}")
+    if response.status_code in (404, 410):
+        return record_id, None
+    response.raise_for_status()
+    return record_id, summarize(response.json())
+
+# ---------------- Cache ----------------
+def load_cache(path=CACHE_PATH):
+    if not os.path.exists(path):
+        return {"fetched_at": 0, "depositions": {}, "md5": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_cache(cache, path=CACHE_PATH):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+def get_depositions(cache, registry_ids, refresh=False, workers=FETCH_WORKERS):
+    """Deposition summaries for the account plus every registry id, listed in bulk and cached"""
+    age_hours = (time.time() - cache["fetched_at"]) / 3600
+    if refresh or age_hours > CACHE_MAX_AGE_HOURS:
+        print("Listing depositions...")
+        listed = list_depositions(session, ZENODO_API_URL, ZENODO_API_TOKEN, page_size=PAGE_SIZE, workers=workers)
+        cache["depositions"] = {str(i): summarize(d) for i, d in listed.items()}
+        print(f"   {len(listed)} depositions")
+        cache["fetched_at"] = time.time()
+    else:
+        print(f"Using the deposition listing from {age_hours:.1f}h ago (--refresh to list again)")
+
+    # Records of other accounts, or deleted ones, are not listed: look them up one by one
+    unlisted = [i for i in registry_ids if str(i) not in cache["depositions"]]
+    if unlisted:
+        print(f"Looking up {len(unlisted)} records missing from the listing...")
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            for record_id, summary in pool.map(fetch_record, unlisted):
+                cache["depositions"][str(record_id)] = summary
+    return cache["depositions"]
+
+def file_md5(path, cache):
+    """MD5 of a local file, reused from the cache while its size and mtime are unchanged"""
+    stat = os.stat(path)
+    cached = cache["md5"].get(path)
+    if cached and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+        return cached[2]
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    cache["md5"][path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+    return digest.hexdigest()
+
+# ---------------- Checks ----------------
+def verify(rows, depositions, download_cache, cache, workers=HASH_WORKERS):
+    """Compare registry rows with Zenodo and the download cache. Returns the report dict"""
+    report = {"checked": len(rows), "missing": [], "unpublished": [], "doi_mismatch": [],
+              "youtube_mismatch": [], "checksum_mismatch": [], "checksums_verified": 0,
+              "duplicate_youtube": [], "unregistered": []}
+    local = []
+
+    for row in rows:
+        deposition = depositions.get(str(row["zenodo_id"]))
+        entry = {"zenodo_id": row["zenodo_id"], "youtube_id": row["youtube_id"], "title": row["title"]}
+        if deposition is None:
+            report["missing"].append(entry)
+            continue
+        if not deposition["published"]:
+            report["unpublished"].append(entry)
+        if deposition["doi"].lower() != (row["doi"] or "").lower():
+            report["doi_mismatch"].append(dict(entry, registry=row["doi"], zenodo=deposition["doi"]))
+        if deposition["youtube_id"] and deposition["youtube_id"] != row["youtube_id"]:
+            report["youtube_mismatch"].append(dict(entry, zenodo=deposition["youtube_id"]))
+        cached = download_cache.entry(row["youtube_id"]) if download_cache else None
+        if cached and os.path.exists(cached["path"]):
+            local.append((entry, cached["path"], deposition["files"]))
+
+    # Only files with a same-size counterpart on Zenodo are worth hashing
+    def check(item):
+        entry, path, files = item
+        size = os.path.getsize(path)
+        candidates = {f["md5"] for f in files if f["size"] == size}
+        if candidates and file_md5(path, cache) in candidates:
+            return None
+        return dict(entry, path=path, size=size, zenodo_files=files)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for mismatch in pool.map(check, local):
+            if mismatch:
+                report["checksum_mismatch"].append(mismatch)
+            else:
+                report["checksums_verified"] += 1
+
+    # The same video archived under several records, per the registry or per Zenodo's own metadata
+    archived = {}
+    for row in rows:
+        archived.setdefault(row["youtube_id"], set()).add(row["zenodo_id"])
+    for deposition in depositions.values():
+        if deposition and deposition["published"] and deposition["youtube_id"]:
+            archived.setdefault(deposition["youtube_id"], set()).add(deposition["id"])
+    report["duplicate_youtube"] = [{"youtube_id": y, "zenodo_ids": sorted(ids)}
+                                   for y, ids in sorted(archived.items()) if len(ids) > 1]
+
+    registered = {row["zenodo_id"] for row in rows}
+    report["unregistered"] = [{"zenodo_id": d["id"], "youtube_id": d["youtube_id"], "title": d["title"]}
+                              for d in depositions.values()
+                              if d and d["published"] and d["id"] not in registered]
+    return report
+
+def print_summary(report, seconds):
+    print(f"\n📋 Verified {report['checked']} registry rows in {seconds:.1f}s:")
+    for key, label in (("missing", "do not resolve"), ("unpublished", "are still drafts"),
+                       ("doi_mismatch", "have a different DOI"), ("youtube_mismatch", "archive another video"),
+                       ("checksum_mismatch", "differ from the local download"),
+                       ("duplicate_youtube", "YouTube videos are archived more than once"),
+                       ("unregistered", "published records are not in the registry")):
+        mark = "⚠️" if report[key] else "✅"
+        print(f"  {mark} {len(report[key])} {label}")
+    print(f"  ✔️ {report['checksums_verified']} local downloads match their Zenodo checksum")
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description="Check zenodo_registry.csv against Zenodo and the local download cache.")
+    parser.add_argument("--refresh", action="store_true",
+                        help=f"list depositions again even if the cached listing is under {CACHE_MAX_AGE_HOURS}h old")
+    parser.add_argument("--no-checksums", action="store_true", help="skip hashing local downloads")
+    parser.add_argument("--workers", type=int, default=FETCH_WORKERS, help="concurrent page fetches and lookups")
+    parser.add_argument("--report", default=REPORT_PATH, help="where to write the JSON diff report")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    dump_stats_at_exit()
+    started = time.monotonic()
+
+    rows = Registry(REGISTRY_DB_PATH, CSV_DB_PATH).published_rows()
+    cache = load_cache()
+    try:
+        depositions = get_depositions(cache, [row["zenodo_id"] for row in rows], args.refresh, args.workers)
+    except requests.exceptions.RequestException as e:
+        print(f"❌ Error fetching depositions, nothing verified: {e}")
+        raise SystemExit(1)
+    download_cache = None
+    if not args.no_checksums and os.path.isdir(DOWNLOAD_DIR):
+        download_cache = DownloadCache(DOWNLOAD_DIR)
+    try:
+        report = verify(rows, depositions, download_cache, cache)
+    finally:
+        save_cache(cache)
+
+    print_summary(report, time.monotonic() - started)
+    with open(args.report, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"📝 Report written to {args.report}")
+    if any(report[key] for key in ("missing", "doi_mismatch", "youtube_mismatch", "checksum_mismatch")):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
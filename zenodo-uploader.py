@@ -1,46 +1,127 @@
-import requests
+import argparse
 import os
 import time
 import sys
 import json
 import yt_dlp
-import csv
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from derivatives import PROFILES, DerivativeStage
+from download_cache import DownloadCache
+from enrichment import ENRICHMENT_DIR, Enricher
+from job_journal import JobJournal
+from http_client import RETRIES, RETRY_STATUSES, backoff_delay, get_limiter, get_session, dump_stats_at_exit
+from instrumentation import PROFILERS, instrument
+from metadata_update import STATE_PATH as METADATA_STATE_PATH, MetadataUpdateState, metadata_digest
+from registry import Registry
+from zenodo_depositions import list_depositions
+from upload_queue import ORDERS, UploadQueue, in_window, parse_window, seconds_until_window
+from zenodo_upload import StreamingUpload
 
 # ------------------------- CONFIGURATION -------------------------
 ZENODO_URL = "https://zenodo.org/api/deposit/depositions"
+YOUTUBE_API_URL = "https://www.googleapis.com/youtube/v3"
 ZENODO_COLLECTION = "sarvamnaya-oral-tradition-archive"
 CHANNEL_ID = "UC4wAYkt8_U1TJOfXkfpjAsw"
 CREATOR_NAME = "Timalsina, Staneshwar"
 ARCHIVE_CITATION = "Vimarsha Foundation. (2025). The Sarvāmnāya Oral Tradition Archive [Data set]. Zenodo. https://doi.org/10.5281/zenodo.15188107"
 ARCHIVE_DOI = "10.5281/zenodo.15188107"
 DOWNLOAD_DIR = "downloaded_videos"
+DOWNLOAD_CACHE_MAX_BYTES = 50 * 1024 ** 3  # Published files beyond this are evicted, least recently used first
 CSV_DB_PATH = "zenodo_registry.csv"
-WAIT_BETWEEN_UPLOADS = 3
+REGISTRY_DB_PATH = "zenodo_registry.db"
+JOURNAL_PATH = "upload_journal.jsonl"
+DOWNLOAD_WORKERS = 2
+UPLOAD_WORKERS = 2
+MAX_PENDING_DOWNLOAD_BYTES = 20 * 1024 ** 3  # Downloaded but not yet uploaded
+YOUTUBE_REQUESTS_PER_SECOND = 5  # Starting rate; adjusted from the API's rate-limit headers
+VIDEO_DETAILS_CACHE_PATH = "youtube_details_cache.json"
+SYNC_STATE_PATH = "youtube_sync_state.json"
+YOUTUBE_BATCH_SIZE = 50  # Maximum ids per videos.list call
+DERIVATIVE_PROFILES = []  # e.g. ["audio-opus", "video-480p"], see derivatives.PROFILES
+UPLOAD_ORIGINAL = True  # Also deposit the downloaded original next to its derivatives
+HTTP_STATS_PATH = None  # Set to a file name to also save per-host HTTP stats as JSON
+INSTRUMENT_EVENTS_PATH = "uploader_events.jsonl"  # Written with --instrument
+INSTRUMENT_REPORT_PATH = "uploader_report.json"
+UPLOAD_QUEUE_PATH = "upload_queue.db"
+SCHEDULE_WINDOWS = []  # Local-time upload windows for --daemon/--drain, e.g. ["01:00-06:00"]
+DAILY_BUDGET_GB = None  # Stop taking queued videos once this much was uploaded today
+QUEUE_ORDER = "priority"  # or "published" (oldest first) or "size" (smallest first)
+QUEUE_POLL_SECONDS = 600  # Daemon sleep while outside a window, over budget or idle
+SYNC_INTERVAL_SECONDS = 3600  # How often the daemon checks the channel for new videos
+YTDLP_FORMAT = 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]'
+ENRICHED_KEYWORDS = 10  # Transcript keywords and Sanskrit terms (each) added to a deposit's keywords
+METADATA_WORKERS = 4  # Concurrent record edits with --update-metadata
 
 os.makedirs(DOWNLOAD_DIR, exist_ok=True)
 
-# ------------------------- CSV FUNCTIONS -------------------------
-
-def initialize_csv():
-    if not os.path.exists(CSV_DB_PATH):
-        with open(CSV_DB_PATH, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["id", "youtube_id", "zenodo_id", "title", "doi", "zenodo_link", "youtube_link"])
-
-def load_processed_youtube_ids():
-    if not os.path.exists(CSV_DB_PATH):
-        return set()
-    with open(CSV_DB_PATH, mode='r', newline='', encoding='utf-8') as file:
-        reader = csv.DictReader(file)
-        return set(row["youtube_id"] for row in reader)
-
-def append_to_csv(youtube_id, zenodo_id, title, doi, youtube_link):
-    with open(CSV_DB_PATH, mode='a', newline='', encoding='utf-8') as file:
-        reader = csv.reader(open(CSV_DB_PATH))
-        row_count = sum(1 for _ in reader) - 1  # Exclude header
-        writer = csv.writer(file)
-        zenodo_url = f"https://zenodo.org/record/{zenodo_id}"
-        writer.writerow([row_count + 1, youtube_id, zenodo_id, title, doi, zenodo_url, youtube_link])
+# ------------------------- PIPELINE HELPERS -------------------------
+class DiskBudget:
+    """Tracks bytes downloaded but not yet uploaded and blocks downloads when over the cap."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.pending_bytes = 0
+        self.condition = threading.Condition()
+
+    def wait_for_room(self):
+        with self.condition:
+            while self.pending_bytes >= self.max_bytes:
+                self.condition.wait()
+
+    def reserve(self, size):
+        with self.condition:
+            self.pending_bytes += size
+
+    def release(self, size):
+        with self.condition:
+            self.pending_bytes -= size
+            self.condition.notify_all()
+
+class StageStats:
+    """Collects per-stage item counts, busy time and bytes for the throughput report."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stages = {}
+        self.started = time.monotonic()
+
+    def record(self, stage, seconds, size=0):
+        with self.lock:
+            entry = self.stages.setdefault(stage, {"items": 0, "seconds": 0.0, "bytes": 0})
+            entry["items"] += 1
+            entry["seconds"] += seconds
+            entry["bytes"] += size
+
+    def report(self):
+        wall = time.monotonic() - self.started
+        print(f"\n📊 Pipeline throughput ({wall:.1f}s wall time):")
+        for stage, entry in self.stages.items():
+            mb = entry["bytes"] / (1024 * 1024)
+            rate = mb / entry["seconds"] if entry["seconds"] else 0.0
+            per_min = entry["items"] / wall * 60 if wall else 0.0
+            print(f"  {stage:<10} {entry['items']:>4} items  {entry['seconds']:>8.1f}s busy  "
+                  f"{mb:>9.1f} MB  {rate:>7.2f} MB/s  {per_min:>6.2f} items/min")
+
+# Every session request waits on its host's limiter, shared with the upload session;
+# zenodo.org starts at http_client.ZENODO_REQUESTS_PER_SECOND
+get_limiter("www.googleapis.com", YOUTUBE_REQUESTS_PER_SECOND)
+details_lock = threading.Lock()
+
+registry = Registry(REGISTRY_DB_PATH, CSV_DB_PATH)
+download_cache = DownloadCache(DOWNLOAD_DIR, DOWNLOAD_CACHE_MAX_BYTES)
+journal = JobJournal(JOURNAL_PATH)
+video_queue = UploadQueue(UPLOAD_QUEUE_PATH)
+enricher = Enricher(ENRICHMENT_DIR)
+
+youtube_session = get_session("youtube", pool_maxsize=DOWNLOAD_WORKERS)
+zenodo_session = get_session("zenodo", pool_maxsize=max(UPLOAD_WORKERS, METADATA_WORKERS))
+# Bucket uploads retry at the file level in StreamingUpload, not in the transport.
+upload_session = get_session("zenodo-upload", pool_maxsize=UPLOAD_WORKERS, retries=0, timeout=(10, 600))
 
 # ------------------------- YOUTUBE FUNCTIONS -------------------------
 def get_channel_videos(channel_id, api_key):
@@ -56,7 +137,7 @@ def get_channel_videos(channel_id, api_key):
             "maxResults": 50,
             "pageToken": next_page_token
         }
-        response = requests.get("https://www.googleapis.com/youtube/v3/search", params=params)
+        response = youtube_session.get(f"{YOUTUBE_API_URL}/search", params=params)
         if not response.ok:
             print(f"❌ Error fetching videos: {response.status_code} - {response.text}")
             break
@@ -77,46 +158,190 @@ def get_channel_videos(channel_id, api_key):
 
     return videos
 
+def details_from_snippet(video_id, snippet):
+    return {
+        "title": snippet["title"],
+        "description": snippet["description"],
+        "tags": snippet.get("tags", []),
+        "published_at": snippet["publishedAt"],
+        "url": f"https://www.youtube.com/watch?v={video_id}"
+    }
+
+def load_details_cache():
+    if not os.path.exists(VIDEO_DETAILS_CACHE_PATH):
+        return {}
+    with open(VIDEO_DETAILS_CACHE_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_details_cache():
+    tmp_path = f"{VIDEO_DETAILS_CACHE_PATH}.tmp"
+    with details_lock:
+        with open(tmp_path, "w", encoding='utf-8') as file:
+            json.dump(details_cache, file, ensure_ascii=False)
+        os.replace(tmp_path, VIDEO_DETAILS_CACHE_PATH)
+
+def prefetch_video_details(video_ids, api_key, refresh=False):
+    """Resolve details for many videos with one videos.list call per 50 ids.
+
+    Results are cached on disk as {video_id: {"etag", "details"}}; cached ids
+    are skipped unless ``refresh`` is set.
+    """
+    wanted = list(dict.fromkeys(video_ids))
+    if not refresh:
+        wanted = [v for v in wanted if v not in details_cache]
+
+    for i in range(0, len(wanted), YOUTUBE_BATCH_SIZE):
+        batch = wanted[i:i + YOUTUBE_BATCH_SIZE]
+        params = {
+            "part": "snippet",
+            "id": ",".join(batch),
+            "maxResults": YOUTUBE_BATCH_SIZE,
+            "key": api_key
+        }
+        response = youtube_session.get(f"{YOUTUBE_API_URL}/videos", params=params)
+        if not response.ok:
+            print(f"❌ Error fetching video details: {response.status_code}")
+            continue
+
+        with details_lock:
+            for item in response.json().get("items", []):
+                cached = details_cache.get(item["id"])
+                if cached and cached["etag"] == item["etag"]:
+                    continue
+                details_cache[item["id"]] = {
+                    "etag": item["etag"],
+                    "details": details_from_snippet(item["id"], item["snippet"])
+                }
+
+    if wanted:
+        save_details_cache()
+
+details_cache = load_details_cache()
+
 def get_video_details(video_id, api_key):
-    url = "https://www.googleapis.com/youtube/v3/videos"
+    if video_id not in details_cache:
+        prefetch_video_details([video_id], api_key)
+    cached = details_cache.get(video_id)
+    return dict(cached["details"]) if cached else None
+
+def load_sync_state():
+    if not os.path.exists(SYNC_STATE_PATH):
+        return {}
+    with open(SYNC_STATE_PATH, encoding='utf-8') as file:
+        return json.load(file)
+
+def save_sync_state(state):
+    tmp_path = f"{SYNC_STATE_PATH}.tmp"
+    with open(tmp_path, "w", encoding='utf-8') as file:
+        json.dump(state, file, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, SYNC_STATE_PATH)
+
+def get_uploads_playlist_id(channel_id, api_key):
+    params = {"part": "contentDetails", "id": channel_id, "key": api_key}
+    response = youtube_session.get(f"{YOUTUBE_API_URL}/channels", params=params)
+    response.raise_for_status()
+    items = response.json().get("items", [])
+    if not items:
+        raise Exception(f"Channel not found: {channel_id}")
+    return items[0]["contentDetails"]["relatedPlaylists"]["uploads"]
+
+def fetch_playlist_page(playlist_id, api_key, page_token):
     params = {
+        "key": api_key,
+        "playlistId": playlist_id,
         "part": "snippet",
-        "id": video_id,
-        "key": api_key
+        "maxResults": 50,
+        "pageToken": page_token
     }
-    response = requests.get(url, params=params)
+    response = youtube_session.get(f"{YOUTUBE_API_URL}/playlistItems", params=params)
     if not response.ok:
-        print(f"❌ Error fetching video details: {response.status_code}")
-        return None
-
-    items = response.json().get("items", [])
-    if not items:
+        print(f"❌ Error fetching uploads: {response.status_code} - {response.text}")
         return None
+    return response.json()
 
-    snippet = items[0]["snippet"]
+def video_from_playlist_item(item):
+    snippet = item["snippet"]
     return {
+        "video_id": snippet["resourceId"]["videoId"],
         "title": snippet["title"],
         "description": snippet["description"],
-        "tags": snippet.get("tags", []),
-        "published_at": snippet["publishedAt"],
-        "url": f"https://www.youtube.com/watch?v={video_id}"
+        "published_at": snippet.get("videoPublishedAt") or snippet["publishedAt"]
     }
 
+def sync_channel_videos(channel_id, api_key, known_ids):
+    """Return channel videos not in ``known_ids`` by reading the uploads playlist newest first.
+
+    Paging stops at the first video that is already registered or older than the
+    last run's newest ``published_at``. Videos that were listed before but not
+    registered (e.g. a declined batch) are kept in the sync state and returned
+    again. If paging fails midway, the page token is saved and the next run
+    continues the scan from there.
+    """
+    state = load_sync_state()
+    if state.get("channel_id") != channel_id:
+        state = {"channel_id": channel_id}
+    if "uploads_playlist_id" not in state:
+        state["uploads_playlist_id"] = get_uploads_playlist_id(channel_id, api_key)
+    watermark = state.get("newest_published_at")
+
+    found = {}
+    newest = watermark
+
+    def scan(page_token, stop_at_known):
+        while True:
+            data = fetch_playlist_page(state["uploads_playlist_id"], api_key, page_token)
+            if data is None:
+                return page_token
+            for item in data.get("items", []):
+                video = video_from_playlist_item(item)
+                if stop_at_known and (video["video_id"] in known_ids
+                                      or (watermark and video["published_at"] <= watermark)):
+                    return None
+                if video["video_id"] not in known_ids:
+                    found.setdefault(video["video_id"], video)
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                return None
+
+    failed_token = scan(None, stop_at_known=True)
+    if failed_token is None and state.get("resume_page_token"):
+        print("⏩ Resuming interrupted scan of older uploads...")
+        failed_token = scan(state["resume_page_token"], stop_at_known=False)
+    state["resume_page_token"] = failed_token
+
+    for video in state.get("pending", []):
+        if video["video_id"] not in known_ids:
+            found.setdefault(video["video_id"], video)
+    for video in found.values():
+        if newest is None or video["published_at"] > newest:
+            newest = video["published_at"]
+
+    videos = sorted(found.values(), key=lambda v: v["published_at"], reverse=True)
+    state["newest_published_at"] = newest
+    state["pending"] = videos
+    save_sync_state(state)
+    return videos
+
 # ------------------------- VIDEO DOWNLOAD -------------------------
 def sanitize_filename(title):
     safe_title = "".join(c for c in title if c.isalnum() or c in (' ', '.', '_')).rstrip()
     return safe_title[:100]
 
-def download_video(video_url, video_title):
-    safe_title = sanitize_filename(video_title)
-    file_path = os.path.join(DOWNLOAD_DIR, f"{safe_title}.mp4")
+def deposit_file_name(video_id, title, file_path):
+    """Name a cached file (``<video_id>.mp4``, ``<video_id>.opus``, ...) after the video title in Zenodo."""
+    base = os.path.basename(file_path)
+    if base.startswith(video_id):
+        return sanitize_filename(title) + base[len(video_id):]
+    return base
 
-    if os.path.exists(file_path):
-        return file_path
+def download_video(video_id, video_url):
+    cached = download_cache.lookup(video_id)
+    if cached:
+        return cached
 
     ydl_opts = {
-        'format': 'bestvideo[ext=mp4]+bestaudio[ext=m4a]/best[ext=mp4]',
-        'outtmpl': os.path.join(DOWNLOAD_DIR, f'{safe_title}.%(ext)s'),
+        'format': YTDLP_FORMAT,
+        'outtmpl': os.path.join(download_cache.partial_dir, f'{video_id}.%(ext)s'),
         'quiet': False,
         'merge_output_format': 'mp4',
     }
@@ -124,13 +349,34 @@ def download_video(video_url, video_title):
     try:
         with yt_dlp.YoutubeDL(ydl_opts) as ydl:
             ydl.download([video_url])
-            return file_path
     except Exception as e:
         print(f"❌ Download failed: {e}")
         return None
 
+    finished = os.path.join(download_cache.partial_dir, f"{video_id}.mp4")
+    if not os.path.exists(finished):
+        print(f"❌ Download failed: {finished} was not produced")
+        return None
+    return download_cache.store(video_id, finished)
+
+def estimate_download_size(video_id, video_url):
+    """Size of the cached file, or yt_dlp's estimate from format metadata (nothing is downloaded)."""
+    entry = download_cache.entry(video_id)
+    if entry:
+        return entry["size"]
+    try:
+        with yt_dlp.YoutubeDL({'format': YTDLP_FORMAT, 'quiet': True}) as ydl:
+            info = ydl.extract_info(video_url, download=False)
+    except Exception:
+        return None
+    sizes = [f.get("filesize") or f.get("filesize_approx") for f in info.get("requested_formats") or [info]]
+    return sum(sizes) if all(sizes) else None
+
 # ------------------------- ZENODO FUNCTIONS -------------------------
 def build_metadata(video):
+    enrichment = video.get("enrichment") or {}
+    terms = enrichment.get("terms", [])[:ENRICHED_KEYWORDS]
+    topics = enrichment.get("keywords", [])[:ENRICHED_KEYWORDS]
     metadata = {
         "title": video["title"],
         "upload_type": "presentation",
@@ -138,9 +384,9 @@ def build_metadata(video):
         "creators": [{"name": CREATOR_NAME}],
         "access_right": "open",
         "license": "cc-by-4.0",
-        "keywords": list(set([
+        "keywords": list(dict.fromkeys(list(set([
             "sarvamnaya", "vimarsha-foundation", "sarvamnaya-oral-tradition-archive"
-        ] + video.get("tags", []))),
+        ] + video.get("tags", []))) + terms + topics)),
         "publication_date": video["published_at"][:10],
         "communities": [{"identifier": ZENODO_COLLECTION}],
         "related_identifiers": [
@@ -157,105 +403,662 @@ def build_metadata(video):
         ],
         "series_title": "The Sarvāmnāya Oral Tradition Archive"
     }
+    if terms or topics:
+        metadata["description"] += (
+            (f"\n\nSanskrit terms: {', '.join(terms)}" if terms else "")
+            + (f"\nTopics (from the {enrichment['captions']} captions): {', '.join(topics)}"
+               if topics and enrichment.get("captions") else "")
+        )
 
     return {"metadata": metadata}
 
-def create_deposition(metadata):
+def create_deposition(metadata, video_url=None):
+    """Create a draft. After a 5xx or a lost response the POST may still have
+    created it, so with ``video_url`` the recent drafts are searched first and
+    the request is only repeated if none matches."""
     headers = {
         "Authorization": f"Bearer {ZENODO_TOKEN}",
         "Content-Type": "application/json"
     }
 
-    response = requests.post(ZENODO_URL, json=metadata, headers=headers)
-    if not response.ok:
-        raise Exception(f"Deposition creation failed: {response.status_code}\n{response.text}")
-    return response.json()
+    attempt = 0
+    while True:
+        try:
+            response = zenodo_session.post(ZENODO_URL, json=metadata, headers=headers)
+            if response.ok:
+                return response.json()
+            error = f"{response.status_code}\n{response.text}"
+            retryable = response.status_code in RETRY_STATUSES
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            error, retryable = str(e), True
+        if not retryable or not video_url or attempt >= RETRIES:
+            raise Exception(f"Deposition creation failed: {error}")
+        draft = find_orphan_draft(video_url)
+        if draft:
+            print(f"🔎 Draft {draft['id']} was created despite the error; using it")
+            return draft
+        time.sleep(backoff_delay(attempt))
+        attempt += 1
 
-def upload_file_to_deposition(bucket_url, file_path):
+def upload_file_to_deposition(bucket_url, file_path, file_name=None, check_existing=False):
+    """Upload one file and return the finished ``StreamingUpload`` with its transfer stats."""
+    upload = StreamingUpload(bucket_url, file_path, ZENODO_TOKEN, session=upload_session, file_name=file_name)
+    upload.run(check_existing=check_existing)
+    print(f"   📤 {upload.file_name}: {upload.size / (1024 * 1024):.1f} MB in {upload.elapsed:.1f}s "
+          f"({upload.bytes_per_second / (1024 * 1024):.2f} MB/s, {upload.attempts} attempt(s), "
+          f"{upload.wasted_bytes / (1024 * 1024):.1f} MB wasted)")
+    return upload
+
+def get_deposition(deposition_id):
     headers = {"Authorization": f"Bearer {ZENODO_TOKEN}"}
-    file_name = os.path.basename(file_path)
+    response = zenodo_session.get(f"{ZENODO_URL}/{deposition_id}", headers=headers)
+    response.raise_for_status()
+    return response.json()
 
-    with open(file_path, "rb") as file:
-        upload_response = requests.put(f"{bucket_url}/{file_name}", data=file, headers=headers)
+def deposition_exists(deposition_id):
+    """False if Zenodo no longer knows the deposition (deleted draft)."""
+    headers = {"Authorization": f"Bearer {ZENODO_TOKEN}"}
+    response = zenodo_session.get(f"{ZENODO_URL}/{deposition_id}", headers=headers)
+    if response.status_code in (404, 410):
+        return False
+    response.raise_for_status()
+    return True
 
-    if not upload_response.ok:
-        raise Exception(f"Upload failed: {upload_response.status_code} - {upload_response.text}")
-    return upload_response.json()
+def find_orphan_draft(video_url):
+    """Find a recent draft whose metadata points at ``video_url`` (created just before a crash)."""
+    headers = {"Authorization": f"Bearer {ZENODO_TOKEN}"}
+    params = {"status": "draft", "sort": "mostrecent", "size": 50}
+    response = zenodo_session.get(ZENODO_URL, headers=headers, params=params)
+    if not response.ok:
+        return None
+    for draft in response.json():
+        identifiers = draft.get("metadata", {}).get("related_identifiers", [])
+        if any(i.get("identifier") == video_url for i in identifiers):
+            return draft
+    return None
 
 def publish_deposition(deposition_id):
     headers = {"Authorization": f"Bearer {ZENODO_TOKEN}"}
-    response = requests.post(f"{ZENODO_URL}/{deposition_id}/actions/publish", headers=headers)
+    response = zenodo_session.post(f"{ZENODO_URL}/{deposition_id}/actions/publish", headers=headers,
+                                   idempotent=True)
+    if not response.ok:
+        # A retried publish fails if an earlier attempt went through but its response was lost
+        deposition = get_deposition(deposition_id)
+        if deposition.get("submitted") and deposition.get("state") == "done":
+            return deposition
+    response.raise_for_status()
+    return response.json()
+
+def edit_deposition(deposition_id):
+    """Open a published deposition for a metadata edit."""
+    headers = {"Authorization": f"Bearer {ZENODO_TOKEN}"}
+    response = zenodo_session.post(f"{ZENODO_URL}/{deposition_id}/actions/edit", headers=headers, idempotent=True)
     response.raise_for_status()
     return response.json()
 
+def update_deposition(deposition_id, metadata):
+    headers = {
+        "Authorization": f"Bearer {ZENODO_TOKEN}",
+        "Content-Type": "application/json"
+    }
+    response = zenodo_session.put(f"{ZENODO_URL}/{deposition_id}", json=metadata, headers=headers)
+    if not response.ok:
+        raise Exception(f"Metadata update failed: {response.status_code}\n{response.text}")
+    return response.json()
+
+
 # ------------------------- MAIN PROCESS -------------------------
-def process_video(video):
+def prepare_video(video, enrich=False):
+    """Fetch details and download the file. Returns a job for the upload stage or None.
+
+    Videos whose files the journal already records as uploaded are not downloaded again.
+    With ``enrich``, captions are fetched and keywords extracted for videos the
+    enrichment index does not have yet; otherwise only existing entries are used.
+    """
+    youtube_id = video["video_id"]
     print(f"\n📦 Processing: {video['title']}")
-    details = get_video_details(video["video_id"], YOUTUBE_API_KEY)
+    with instrument.span("details", youtube_id):
+        details = get_video_details(youtube_id, YOUTUBE_API_KEY)
     if not details:
         print("❌ Skipping due to missing details.")
-        return
+        return None
+    details["enrichment"] = enricher.get(youtube_id)
+    if enrich:
+        with instrument.span("enrich", youtube_id):
+            try:
+                details["enrichment"] = enricher.enrich(youtube_id, details["url"], details)
+            except Exception as e:
+                print(f"⚠️ Enrichment failed, depositing without it: {e}")
 
-    #confirm = input(f"Upload '{video['title']}' to Zenodo? (y/n): ").strip().lower()
-    #if confirm != 'y':
-    #   print("⏭️ Skipped.")
-    #   return
+    if journal.is_done(youtube_id, "upload"):
+        print("⏩ Files already uploaded, resuming at publish.")
+        return {"video": video, "details": details, "path": None, "files": []}
 
-    path = download_video(details["url"], details["title"])
+    journal.started(youtube_id, "download")
+    with instrument.span("download", youtube_id) as span:
+        path = download_video(youtube_id, details["url"])
+        span.add(bytes=os.path.getsize(path) if path else 0)
     if not path:
-        return
+        return None
+    registry.mark_downloaded(youtube_id, details["title"], details["url"], path)
+    journal.done(youtube_id, "download", path=path)
+
+    return {"video": video, "details": details, "path": path}
 
-    metadata = build_metadata(details)
-    dep = create_deposition(metadata)
-    print("⬆️ Uploading video...")
-    upload_file_to_deposition(dep["links"]["bucket"], path)
-    print("🚀 Publishing...")
-    pub = publish_deposition(dep["id"])
+def deposit_video(job):
+    """Create the deposition, upload the file, publish it and register the result.
+
+    Every stage is journaled before and after it runs. When an earlier run was
+    interrupted, its draft is reused (found through the journal, the registry
+    or, if the crash hit right after creation, the list of recent drafts),
+    files already in the bucket with a matching checksum are not sent again,
+    and a publish that went through is not repeated. A draft that was deleted
+    on Zenodo since is not reused: its stages are journaled as restarted and a
+    new draft is created.
+    """
+    video, details, path = job["video"], job["details"], job["path"]
+    youtube_id = video["video_id"]
+    row = registry.get(youtube_id) or {}
+    previous = journal.job(youtube_id)
+
+    deposition_id = previous.get("deposition_id") or row.get("zenodo_id")
+    bucket_url = previous.get("bucket_url") or row.get("bucket_url")
+    if deposition_id and bucket_url and not deposition_exists(deposition_id):
+        print(f"🗑️ Draft {deposition_id} no longer exists on Zenodo; starting over with a new draft")
+        # Everything journaled after the deposit belonged to the deleted draft
+        for stage in ("deposit", "upload", "publish"):
+            if stage in previous["stages"]:
+                journal.record(youtube_id, stage, "restarted", deposition_id=None, bucket_url=None)
+        previous = journal.job(youtube_id)
+        registry.clear_deposition(youtube_id)
+        row = registry.get(youtube_id) or {}
+        deposition_id = bucket_url = None
+        if path is None:
+            # prepare_video skipped the download because the journal had the upload done
+            raise Exception("draft was deleted; the video will be downloaded again on the next run")
+    if not deposition_id and previous["stages"].get("deposit") == "started":
+        orphan = find_orphan_draft(details["url"])
+        if orphan:
+            deposition_id, bucket_url = orphan["id"], orphan["links"]["bucket"]
+            print(f"🔎 Recovered draft {deposition_id} created by an interrupted run")
+
+    if deposition_id and bucket_url:
+        print(f"♻️ Reusing draft {deposition_id}: {details['title']}")
+    else:
+        journal.started(youtube_id, "deposit")
+        with instrument.span("deposit", youtube_id):
+            dep = create_deposition(build_metadata(details), details["url"])
+        deposition_id, bucket_url = dep["id"], dep["links"]["bucket"]
+    if previous["stages"].get("deposit") != "done":
+        journal.done(youtube_id, "deposit", deposition_id=deposition_id, bucket_url=bucket_url)
+    if row.get("zenodo_id") != deposition_id:
+        registry.mark_deposited(youtube_id, deposition_id, bucket_url)
+
+    if not (row.get("uploaded_at") or journal.is_done(youtube_id, "upload")):
+        resuming = previous["stages"].get("upload") == "started"
+        journal.started(youtube_id, "upload", deposition_id=deposition_id)
+        for file_path in job.get("files", [path]):
+            file_name = deposit_file_name(youtube_id, details["title"], file_path)
+            print(f"⬆️ Uploading {file_name}")
+            with instrument.span("upload", youtube_id, file=file_name) as span:
+                upload = upload_file_to_deposition(bucket_url, file_path, file_name, check_existing=resuming)
+                span.add(bytes=upload.bytes_sent, attempts=upload.attempts, wasted_bytes=upload.wasted_bytes)
+        journal.done(youtube_id, "upload", deposition_id=deposition_id)
+        registry.mark_uploaded(youtube_id)
+
+    pub = None
+    if previous["stages"].get("publish") == "started":
+        current = get_deposition(deposition_id)
+        if current.get("submitted"):
+            pub = current
+    if pub is None:
+        print(f"🚀 Publishing: {details['title']}")
+        journal.started(youtube_id, "publish", deposition_id=deposition_id)
+        with instrument.span("publish", youtube_id):
+            pub = publish_deposition(deposition_id)
     print(f"✅ Published! DOI: {pub['metadata']['doi']}")
-    append_to_csv(
-        youtube_id=video["video_id"],
-        zenodo_id=dep["id"],
-        title=details["title"],
-        doi=pub['metadata']['doi'],
-        youtube_link=details["url"]
-    )
+    registry.mark_published(youtube_id, pub['metadata']['doi'])
+    journal.done(youtube_id, "publish", doi=pub['metadata']['doi'])
+    download_cache.mark_published(youtube_id)
 
-def main():
-    try:
-        initialize_csv()
-        processed_ids = load_processed_youtube_ids()
+def process_video(video):
+    job = prepare_video(video)
+    if job:
+        deposit_video(job)
 
-        print("📺 Fetching videos...")
-        videos = get_channel_videos(CHANNEL_ID, YOUTUBE_API_KEY)
-        print(f"Found {len(videos)} videos.")
+def print_derivative_report(reports):
+    print("\n🎛️ Derivatives (MB original -> MB deposited, saved, wall time):")
+    saved_total = 0
+    for title, report in reports:
+        saved = report["original_bytes"] - report["upload_bytes"]
+        saved_total += saved
+        print(f"  {report['original_bytes'] / 1048576:>9.1f} -> {report['upload_bytes'] / 1048576:>9.1f}  "
+              f"{saved / 1048576:>9.1f} saved  {report['seconds']:>7.1f}s  {title[:60]}")
+    print(f"  Total saved: {saved_total / 1048576:.1f} MB over {len(reports)} video(s)")
+
+def run_pipeline(videos, download_workers=DOWNLOAD_WORKERS, upload_workers=UPLOAD_WORKERS,
+                 max_pending_bytes=MAX_PENDING_DOWNLOAD_BYTES, derivative_stage=None, on_finished=None,
+                 enrich=False):
+    """Download and upload videos concurrently through two bounded worker pools.
 
-        # Filter out already processed videos
-        new_videos = [v for v in videos if v["video_id"] not in processed_ids]
+    With a ``derivative_stage``, each download is transcoded before it is queued
+    for upload and the deposit carries the files that stage returns.
 
-        batch_number = 100
-        for i in range(0, len(new_videos), batch_number):
-            batch = new_videos[i:i + batch_number]
-            print("\n🔢 Upcoming batch:")
-            for idx, v in enumerate(batch, start=1):
-                print(f"  [{idx}] {v['title']}")
+    ``videos`` is consumed lazily, one item per free download slot, so it can be
+    a generator that decides when to hand out the next video. ``on_finished``
+    is called as ``on_finished(video, ok, bytes_uploaded, error)`` once per video.
+    ``enrich`` is passed on to ``prepare_video``.
+    """
+    download_queue = queue.Queue(maxsize=download_workers)
+    upload_queue = queue.Queue(maxsize=upload_workers * 2)
+    disk_budget = DiskBudget(max_pending_bytes)
+    stats = StageStats()
+    derivative_reports = []
 
-            choice = input("\n🚀 Upload this batch of videos? (y/n): ").strip().lower()
-            if choice != 'y':
-                print("⏭️ Skipping this batch.\n")
+    def finished(video, ok, bytes_uploaded=0, error=None):
+        if on_finished:
+            on_finished(video, ok, bytes_uploaded, error)
+
+    def download_worker():
+        while True:
+            video = download_queue.get()
+            if video is None:
+                return
+            disk_budget.wait_for_room()
+            started = time.monotonic()
+            try:
+                job = prepare_video(video, enrich)
+            except Exception as e:
+                print(f"⚠️ Error downloading '{video['title']}': {e}")
+                finished(video, False, error=str(e))
+                continue
+            if not job:
+                finished(video, False, error="no details or download failed")
+                continue
+            if job["path"] is None:
+                # Already uploaded by an interrupted run; only publishing is left
+                job["size"] = 0
+                upload_queue.put(job)
                 continue
+            stats.record("download", time.monotonic() - started, os.path.getsize(job["path"]))
 
-            for v in batch:
+            job["files"] = [job["path"]]
+            if derivative_stage:
                 try:
-                    process_video(v)
-                    time.sleep(WAIT_BETWEEN_UPLOADS)
+                    with instrument.span("derive", video["video_id"]) as span:
+                        report = derivative_stage.run(job["path"])
+                        span.add(bytes=report["upload_bytes"])
                 except Exception as e:
-                    print(f"⚠️ Error processing '{v['title']}': {e}")
+                    print(f"⚠️ Error creating derivatives for '{video['title']}': {e}")
+                    finished(video, False, error=str(e))
+                    continue
+                job["files"] = report["files"]
+                stats.record("derive", report["seconds"], report["upload_bytes"])
+                derivative_reports.append((job["details"]["title"], report))
+
+            job["size"] = sum(os.path.getsize(f) for f in set(job["files"] + [job["path"]]))
+            disk_budget.reserve(job["size"])
+            upload_queue.put(job)
+
+    def upload_worker():
+        while True:
+            job = upload_queue.get()
+            if job is None:
+                return
+            started = time.monotonic()
+            try:
+                # Measured up front: publishing may evict the files from the download cache.
+                # Inside the try, so a missing file fails this video instead of the worker.
+                upload_bytes = sum(os.path.getsize(f) for f in job["files"])
+                deposit_video(job)
+                stats.record("upload", time.monotonic() - started, upload_bytes)
+                finished(job["video"], True, upload_bytes)
+            except Exception as e:
+                print(f"⚠️ Error processing '{job['video']['title']}': {e}")
+                finished(job["video"], False, error=str(e))
+            finally:
+                disk_budget.release(job["size"])
+
+    downloaders = [threading.Thread(target=download_worker, daemon=True) for _ in range(download_workers)]
+    uploaders = [threading.Thread(target=upload_worker, daemon=True) for _ in range(upload_workers)]
+    for thread in downloaders + uploaders:
+        thread.start()
+
+    for video in videos:
+        download_queue.put(video)
+    for _ in downloaders:
+        download_queue.put(None)
+    for thread in downloaders:
+        thread.join()
+    for _ in uploaders:
+        upload_queue.put(None)
+    for thread in uploaders:
+        thread.join()
+
+    stats.report()
+    if derivative_reports:
+        print_derivative_report(derivative_reports)
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Archive YouTube channel videos to Zenodo.")
+    parser.add_argument("--full-sync", action="store_true",
+                        help="scan the whole channel with search.list instead of the incremental uploads sync")
+    parser.add_argument("--derivatives", default=",".join(DERIVATIVE_PROFILES),
+                        help=f"comma-separated derivative profiles to deposit ({', '.join(PROFILES)})")
+    parser.add_argument("--no-original", action="store_true",
+                        help="deposit only the derivatives, not the downloaded original")
+    parser.add_argument("--enrich", action="store_true",
+                        help="fetch captions of new videos and add transcript keywords and Sanskrit terms "
+                             "to their metadata (see enrich-videos.py for the backlog)")
+    parser.add_argument("--instrument", action="store_true",
+                        help=f"write per-stage and per-request events to {INSTRUMENT_EVENTS_PATH} "
+                             f"and a timing report to {INSTRUMENT_REPORT_PATH}")
+    parser.add_argument("--profile", choices=PROFILERS,
+                        help="also profile the run with cProfile or tracemalloc (implies --instrument)")
+    scheduled = parser.add_argument_group("scheduled mode (persistent queue in %s)" % UPLOAD_QUEUE_PATH)
+    mode = scheduled.add_mutually_exclusive_group()
+    mode.add_argument("--enqueue", action="store_true",
+                      help="sync the channel and review new videos batch by batch; answers go to the queue")
+    mode.add_argument("--drain", action="store_true",
+                      help="upload approved queued videos now, within the windows and budget, then exit")
+    mode.add_argument("--daemon", action="store_true",
+                      help="keep syncing and uploading approved queued videos within the windows and budget")
+    mode.add_argument("--status", action="store_true", help="show the queue, today's usage and the next items")
+    mode.add_argument("--set-priority", nargs=2, metavar=("VIDEO_ID", "PRIORITY"),
+                      help="change the priority of a queued video (higher goes first)")
+    scheduled.add_argument("--auto-approve", action="store_true",
+                           help="with --daemon, queue newly found videos as approved instead of pending")
+    scheduled.add_argument("--order", choices=sorted(ORDERS), default=QUEUE_ORDER)
+    scheduled.add_argument("--window", action="append", metavar="HH:MM-HH:MM",
+                           help="local-time upload window (repeatable; default SCHEDULE_WINDOWS)")
+    scheduled.add_argument("--budget-gb", type=float, help="daily upload budget (default DAILY_BUDGET_GB)")
+    update = parser.add_argument_group("metadata update (published records, no file transfers)")
+    update.add_argument("--update-metadata", action="store_true",
+                        help="re-edit published registry records whose metadata differs from build_metadata")
+    update.add_argument("--record", action="append", metavar="ZENODO_ID", help="only update this record (repeatable)")
+    update.add_argument("--force", action="store_true", help="update records even if their metadata already matches")
+    update.add_argument("--dry-run", action="store_true", help="only list the records that would be updated")
+    update.add_argument("--metadata-workers", type=int, default=METADATA_WORKERS,
+                        help="records edited concurrently")
+    return parser.parse_args()
+
+def list_new_videos(full_sync=False):
+    """Channel videos that are not published yet, plus videos an earlier run left unfinished."""
+    processed_ids = registry.published_youtube_ids()
+
+    print("📺 Fetching videos...")
+    if full_sync:
+        videos = get_channel_videos(CHANNEL_ID, YOUTUBE_API_KEY)
+    else:
+        videos = sync_channel_videos(CHANNEL_ID, YOUTUBE_API_KEY, processed_ids)
+    print(f"Found {len(videos)} videos.")
+
+    # Resume videos an earlier run left unfinished
+    listed = {v["video_id"] for v in videos}
+    for row in registry.unfinished_rows():
+        if row["youtube_id"] not in listed:
+            videos.append({"video_id": row["youtube_id"], "title": row["title"]})
+            listed.add(row["youtube_id"])
+    for youtube_id in journal.unfinished():
+        if youtube_id not in listed:
+            videos.append({"video_id": youtube_id, "title": youtube_id})
+
+    # Filter out already processed videos
+    return [v for v in videos if v["video_id"] not in processed_ids]
+
+def preview_batches(videos, batch_number=100):
+    """Show videos in batches and ask for each. Returns (approved, declined)."""
+    approved, declined = [], []
+    for i in range(0, len(videos), batch_number):
+        batch = videos[i:i + batch_number]
+        print("\n🔢 Upcoming batch:")
+        for idx, v in enumerate(batch, start=1):
+            print(f"  [{idx}] {v['title']}")
+
+        choice = input("\n🚀 Upload this batch of videos? (y/n): ").strip().lower()
+        if choice != 'y':
+            print("⏭️ Skipping this batch.\n")
+            declined.extend(batch)
+            continue
+        approved.extend(batch)
+    return approved, declined
+
+def make_derivative_stage(args):
+    profiles = [p for p in args.derivatives.split(",") if p]
+    keep_original = UPLOAD_ORIGINAL and not args.no_original
+    return DerivativeStage(profiles, keep_original) if profiles or not keep_original else None
+
+def run_videos(videos, args, on_finished=None):
+    derivative_stage = make_derivative_stage(args)
+    try:
+        run_pipeline(videos, derivative_stage=derivative_stage, on_finished=on_finished, enrich=args.enrich)
+    finally:
+        if derivative_stage:
+            derivative_stage.shutdown()
+    registry.export_csv()
+    journal.compact()
+
+# ------------------------- SCHEDULED MODE -------------------------
+def enqueue_new_videos(args, status):
+    """Sync the channel and add unseen videos to the queue with ``status``."""
+    videos = list_new_videos(args.full_sync)
+    if args.order == "size":
+        prefetch_video_details([v["video_id"] for v in videos], YOUTUBE_API_KEY)
+        for v in videos:
+            details = get_video_details(v["video_id"], YOUTUBE_API_KEY)
+            if details:
+                v["size_bytes"] = estimate_download_size(v["video_id"], details["url"])
+    added = video_queue.add(videos, status)
+    print(f"📥 {added} new video(s) queued as {status}.")
+
+def approve_queued():
+    """The batch preview as an approval gate: answers go to the queue, nothing is uploaded."""
+    pending = [{"video_id": r["youtube_id"], "title": r["title"]} for r in video_queue.rows("pending")]
+    if not pending:
+        print("Nothing waiting for approval.")
+        return
+    approved, declined = preview_batches(pending)
+    video_queue.set_status([v["video_id"] for v in approved], "approved")
+    video_queue.set_status([v["video_id"] for v in declined], "declined")
+    print(f"✅ {len(approved)} approved, {len(declined)} declined.")
+
+def budget_left(budget_bytes, in_flight=None):
+    """Whether today's uploads plus the estimated size of videos in progress stay under the budget."""
+    if budget_bytes is None:
+        return True
+    return video_queue.bytes_today() + sum((in_flight or {}).values()) < budget_bytes
+
+def queued_videos(order, windows, budget_bytes, in_flight):
+    """Hand out approved videos one at a time while the window is open and the budget lasts."""
+    while in_window(windows) and budget_left(budget_bytes, in_flight):
+        item = video_queue.take(order)
+        if item is None:
+            return
+        in_flight[item["youtube_id"]] = item["size_bytes"] or 0
+        yield {"video_id": item["youtube_id"], "title": item["title"] or item["youtube_id"]}
+
+def run_queue(args, daemon):
+    """Upload approved videos from the queue inside the windows and budget.
+
+    With ``daemon``, keep running: sync the channel every ``SYNC_INTERVAL_SECONDS``
+    and sleep while outside a window, over budget or out of work.
+    """
+    windows = [parse_window(w) for w in (args.window or SCHEDULE_WINDOWS)]
+    budget_gb = args.budget_gb if args.budget_gb is not None else DAILY_BUDGET_GB
+    budget_bytes = int(budget_gb * 1024 ** 3) if budget_gb else None
+    recovered = video_queue.recover()
+    if recovered:
+        print(f"♻️ {recovered} item(s) from an interrupted run returned to the queue.")
+
+    last_sync = None
+    while True:
+        if daemon and (last_sync is None or time.monotonic() - last_sync >= SYNC_INTERVAL_SECONDS):
+            enqueue_new_videos(args, "approved" if args.auto_approve else "pending")
+            last_sync = time.monotonic()
+
+        wait = seconds_until_window(windows)
+        if wait or not budget_left(budget_bytes):
+            reason = f"next window opens in {wait / 3600:.1f}h" if wait else "today's bandwidth budget is used"
+            if not daemon:
+                print(f"⏸️ Not uploading: {reason}.")
+                return
+            print(f"💤 Sleeping: {reason}.")
+            time.sleep(min(wait or QUEUE_POLL_SECONDS, QUEUE_POLL_SECONDS))
+            continue
+
+        approved = video_queue.upcoming(args.order, limit=-1)
+        if approved:
+            prefetch_video_details([r["youtube_id"] for r in approved], YOUTUBE_API_KEY)
+            in_flight = {}
+
+            def checkpoint(video, ok, bytes_uploaded, error):
+                video_queue.finish(video["video_id"], ok, bytes_uploaded, error)
+                in_flight.pop(video["video_id"], None)
+
+            run_videos(queued_videos(args.order, windows, budget_bytes, in_flight), args, on_finished=checkpoint)
+        if not daemon:
+            return
+        if not approved:
+            time.sleep(QUEUE_POLL_SECONDS)
+
+def print_queue_status(args):
+    windows = [parse_window(w) for w in (args.window or SCHEDULE_WINDOWS)]
+    budget_gb = args.budget_gb if args.budget_gb is not None else DAILY_BUDGET_GB
+    print(f"📋 Upload queue ({UPLOAD_QUEUE_PATH}):")
+    counts = video_queue.counts()
+    for status in ("pending", "approved", "running", "failed", "done", "declined"):
+        entry = counts.get(status, {"items": 0, "known_bytes": 0})
+        print(f"  {status:<9} {entry['items']:>6} items  {entry['known_bytes'] / 1024 ** 3:>8.2f} GB known")
+    used = video_queue.bytes_today() / 1024 ** 3
+    print(f"  Uploaded today: {used:.2f} GB" + (f" of {budget_gb:g} GB budget" if budget_gb else " (no budget)"))
+    if windows:
+        wait = seconds_until_window(windows)
+        print(f"  Windows: {', '.join(args.window or SCHEDULE_WINDOWS)} "
+              f"({'open now' if not wait else f'next opens in {wait / 3600:.1f}h'})")
+    upcoming = video_queue.upcoming(args.order)
+    if upcoming:
+        print(f"  Next up ({args.order} order):")
+        for row in upcoming:
+            size = f"{row['size_bytes'] / 1024 ** 2:.0f} MB" if row["size_bytes"] else "size unknown"
+            print(f"    [{row['priority']:>3}] {row['youtube_id']}  {row['published_at'] or '':<20}  {size:<12}  "
+                  f"{(row['title'] or '')[:60]}")
+    for row in video_queue.rows("failed"):
+        print(f"  ⚠️ {row['youtube_id']} failed {row['attempts']}x: {row['last_error']}")
+
+def update_published_metadata(args):
+    """Re-edit published records whose metadata differs from what build_metadata gives today.
+
+    Files are never touched: each update is actions/edit, a PUT of the rebuilt
+    metadata and actions/publish, with up to ``--metadata-workers`` records in
+    flight through the shared Zenodo rate limiter. Records already up to date
+    are skipped (see ``metadata_update``), so an interrupted run just resumes.
+    """
+    started = time.monotonic()
+    rows = [row for row in registry.published_rows() if row["zenodo_id"]]
+    if args.record:
+        rows = [row for row in rows if str(row["zenodo_id"]) in set(args.record)]
+    print(f"Listing depositions for {len(rows)} published records...")
+    depositions = list_depositions(zenodo_session, ZENODO_URL, ZENODO_TOKEN, workers=args.metadata_workers)
+    prefetch_video_details([row["youtube_id"] for row in rows], YOUTUBE_API_KEY)
+    state = MetadataUpdateState(METADATA_STATE_PATH)
+
+    counts = {"current": 0, "updated": 0, "missing": 0, "no_details": 0, "failed": 0}
+    todo = []
+    for row in rows:
+        deposition = depositions.get(int(row["zenodo_id"]))
+        if deposition is None:
+            print(f"⚠️ Record {row['zenodo_id']} is not among the account's depositions: {row['title']}")
+            counts["missing"] += 1
+            continue
+        details = get_video_details(row["youtube_id"], YOUTUBE_API_KEY)
+        if not details:
+            print(f"⚠️ No YouTube details for {row['youtube_id']}, keeping record {row['zenodo_id']} as it is")
+            counts["no_details"] += 1
+            continue
+        details["enrichment"] = enricher.get(row["youtube_id"])
+        metadata = build_metadata(details)
+        fields = sorted(metadata["metadata"])
+        wanted = metadata_digest(metadata["metadata"], fields)
+        remote = metadata_digest(deposition.get("metadata", {}), fields)
+        # A record an interrupted run left open is finished even if its metadata already matches
+        if (deposition.get("state") != "inprogress" and not args.force
+                and state.is_current(deposition["id"], wanted, remote)):
+            counts["current"] += 1
+            continue
+        todo.append((row, deposition, metadata, fields, wanted))
+
+    print(f"📝 {len(todo)} records to update, {counts['current']} already up to date.")
+    if args.dry_run:
+        for row, deposition, *_ in todo:
+            print(f"  {deposition['id']}: {row['title']}")
+        return
+
+    def update(item):
+        row, deposition, metadata, fields, wanted = item
+        record_id = deposition["id"]
+        doi = deposition.get("doi") or deposition.get("metadata", {}).get("doi")
+        if doi:
+            metadata = {"metadata": dict(metadata["metadata"], doi=doi)}
+        try:
+            with instrument.span("metadata", row["youtube_id"]):
+                if deposition.get("state") != "inprogress":
+                    edit_deposition(record_id)
+                update_deposition(record_id, metadata)
+                published = publish_deposition(record_id)
+        except Exception as e:
+            print(f"❌ Record {record_id} ({row['title']}): {e}")
+            return "failed"
+        state.done(record_id, wanted, metadata_digest(published.get("metadata", {}), fields))
+        print(f"✅ Updated {record_id}: {row['title']}")
+        return "updated"
+
+    with ThreadPoolExecutor(max_workers=args.metadata_workers) as pool:
+        for outcome in pool.map(update, todo):
+            counts[outcome] += 1
+    print(f"\n🗂️ Metadata update done in {time.monotonic() - started:.1f}s: {counts['updated']} updated, "
+          f"{counts['current']} already current, {counts['failed']} failed, {counts['missing']} not found, "
+          f"{counts['no_details']} without YouTube details")
+
+def main():
+    args = parse_args()
+    if args.status:
+        print_queue_status(args)
+        return
+    if args.set_priority:
+        youtube_id, priority = args.set_priority
+        if not video_queue.set_priority(youtube_id, priority):
+            print(f"❌ {youtube_id} is not in the queue.")
+            sys.exit(1)
+        print(f"✅ Priority of {youtube_id} set to {priority}.")
+        return
+
+    dump_stats_at_exit(HTTP_STATS_PATH)
+    if args.instrument or args.profile:
+        instrument.start(INSTRUMENT_EVENTS_PATH, INSTRUMENT_REPORT_PATH, args.profile)
+    try:
+        if args.update_metadata:
+            update_published_metadata(args)
+            return
+        if args.enqueue:
+            enqueue_new_videos(args, "pending")
+            approve_queued()
+        elif args.daemon or args.drain:
+            run_queue(args, daemon=args.daemon)
+        else:
+            approved, _ = preview_batches(list_new_videos(args.full_sync))
+            if approved:
+                prefetch_video_details([v["video_id"] for v in approved], YOUTUBE_API_KEY)
+                run_videos(approved, args)
 
         print("\n🎉 All batches complete!")
+    except KeyboardInterrupt:
+        print("\n🛑 Interrupted; the queue and journal hold the progress.")
     except Exception as e:
         print(f"❌ Fatal error: {e}")
         sys.exit(1)
+    finally:
+        instrument.finish()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,35 @@
+"""Paginated listing of the account's Zenodo depositions, shared by the scripts.
+
+``list_depositions()`` pages through ``/api/deposit/depositions`` until a page
+comes back short, optionally ``workers`` pages at a time, and returns the raw
+depositions keyed by id. A failed page raises instead of ending the loop, so
+callers never act on a partial listing.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+PAGE_SIZE = 100
+
+
+def fetch_page(session, api_url, token, page, page_size=PAGE_SIZE, status=None):
+    params = {"size": page_size, "page": page}
+    if status:
+        params["status"] = status
+    response = session.get(api_url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    response.raise_for_status()
+    return response.json()
+
+
+def list_depositions(session, api_url, token, status=None, page_size=PAGE_SIZE, workers=1):
+    """Every deposition of the account (only drafts with ``status="draft"``), keyed by id."""
+    found = {}
+    first = 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            pages = list(pool.map(lambda page: fetch_page(session, api_url, token, page, page_size, status),
+                                  range(first, first + workers)))
+            for batch in pages:
+                for deposition in batch:
+                    found[deposition["id"]] = deposition
+            if any(len(batch) < page_size for batch in pages):
+                return found
+            first += workers
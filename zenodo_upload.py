@@ -0,0 +1,192 @@
+"""Chunked, verifiable streaming uploads into a Zenodo deposition bucket.
+
+The bucket API (``PUT {bucket}/{file_name}``) only accepts whole objects, so a
+dropped connection cannot be continued mid-file. What this engine does instead:
+
+* streams the file in fixed-size chunks and computes the MD5 in the same pass,
+* verifies that MD5 against the ``checksum`` the bucket returns,
+* before retrying, asks the bucket whether the object already landed with the
+  expected size and checksum, so a lost response never triggers a re-send,
+* retries with jittered exponential backoff (honouring ``Retry-After``) and
+  reports bytes/s and wasted bytes.
+
+Only ``requests`` is used, so any local HTTP server that answers the bucket
+endpoints can stand in for Zenodo.
+"""
+import hashlib
+import os
+import time
+
+import requests
+
+from http_client import backoff_delay, retry_after_seconds
+
+CHUNK_SIZE = 8 * 1024 * 1024
+MAX_ATTEMPTS = 5
+BACKOFF_SECONDS = 5
+PROGRESS_INTERVAL = 10
+
+
+class UploadError(Exception):
+    pass
+
+
+class _ChunkedFile:
+    """Iterable request body that reads a file in chunks and hashes what it reads.
+
+    ``__len__`` lets requests send a Content-Length instead of chunked encoding.
+    """
+
+    def __init__(self, upload):
+        self.upload = upload
+
+    def __len__(self):
+        return self.upload.size
+
+    def __iter__(self):
+        upload = self.upload
+        digest = hashlib.md5() if upload.md5 is None else None
+        sent = 0
+        last_report = time.monotonic()
+        with open(upload.file_path, "rb") as file:
+            while True:
+                chunk = file.read(upload.chunk_size)
+                if not chunk:
+                    break
+                if digest is not None:
+                    digest.update(chunk)
+                sent += len(chunk)
+                upload.bytes_sent += len(chunk)
+                now = time.monotonic()
+                if now - last_report >= PROGRESS_INTERVAL:
+                    upload.report_progress(sent)
+                    last_report = now
+                yield chunk
+        if digest is not None and sent == upload.size:
+            upload.md5 = digest.hexdigest()
+
+
+class StreamingUpload:
+    """Uploads one file to a deposition bucket. Call ``run()`` and read the stats afterwards."""
+
+    def __init__(self, bucket_url, file_path, token, chunk_size=CHUNK_SIZE,
+                 max_attempts=MAX_ATTEMPTS, backoff_seconds=BACKOFF_SECONDS, session=None, file_name=None):
+        self.bucket_url = bucket_url.rstrip("/")
+        self.file_path = file_path
+        self.file_name = file_name or os.path.basename(file_path)
+        self.size = os.path.getsize(file_path)
+        self.headers = {"Authorization": f"Bearer {token}"}
+        self.chunk_size = chunk_size
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.session = session or requests
+        self.md5 = None
+        self.bytes_sent = 0
+        self.attempts = 0
+        self.started = None
+        self.elapsed = 0.0
+
+    @property
+    def object_url(self):
+        return f"{self.bucket_url}/{self.file_name}"
+
+    @property
+    def wasted_bytes(self):
+        return max(self.bytes_sent - self.size, 0)
+
+    @property
+    def bytes_per_second(self):
+        return self.bytes_sent / self.elapsed if self.elapsed else 0.0
+
+    def report_progress(self, sent):
+        elapsed = time.monotonic() - self.started
+        rate = self.bytes_sent / elapsed / (1024 * 1024) if elapsed else 0.0
+        percent = sent * 100 / self.size if self.size else 100
+        print(f"   ⬆️ {self.file_name}: {percent:.0f}% ({rate:.2f} MB/s)")
+
+    def remote_object(self):
+        """Return the bucket entry for this file, or None if it is not there."""
+        try:
+            response = self.session.get(self.bucket_url, headers=self.headers)
+        except requests.exceptions.RequestException:
+            return None
+        if not response.ok:
+            return None
+        for entry in response.json().get("contents", []):
+            if entry.get("key") == self.file_name:
+                return entry
+        return None
+
+    def matches(self, entry):
+        checksum = entry.get("checksum", "")
+        return (
+            entry.get("size") == self.size
+            and self.md5 is not None
+            and checksum == f"md5:{self.md5}"
+        )
+
+    def existing_match(self):
+        """Return the bucket entry if the complete file is already there, else None."""
+        entry = self.remote_object()
+        if entry and entry.get("size") == self.size and self.md5 is None:
+            self.md5 = file_md5(self.file_path, self.chunk_size)
+        if entry and self.matches(entry):
+            print(f"   ✔️ {self.file_name} already in bucket with matching checksum")
+            return entry
+        return None
+
+    def run(self, check_existing=False):
+        """Upload the file. With ``check_existing``, first ask the bucket whether it already has it."""
+        self.started = time.monotonic()
+        try:
+            if check_existing:
+                entry = self.existing_match()
+                if entry:
+                    return entry
+            return self._run()
+        finally:
+            self.elapsed = time.monotonic() - self.started
+
+    def _run(self):
+        last_error = None
+        retry_after = None
+        while self.attempts < self.max_attempts:
+            if self.attempts:
+                entry = self.existing_match()
+                if entry:
+                    return entry
+                delay = backoff_delay(self.attempts - 1, retry_after, self.backoff_seconds)
+                print(f"   🔁 Retrying {self.file_name} in {delay:.1f}s ({last_error})")
+                time.sleep(delay)
+
+            self.attempts += 1
+            try:
+                response = self.session.put(self.object_url, data=_ChunkedFile(self), headers=self.headers)
+            except requests.exceptions.RequestException as e:
+                last_error = e
+                continue
+
+            if response.status_code >= 500 or response.status_code == 429:
+                last_error = f"{response.status_code} - {response.text}"
+                retry_after = retry_after_seconds(response)
+                continue
+            if not response.ok:
+                raise UploadError(f"Upload failed: {response.status_code} - {response.text}")
+
+            entry = response.json()
+            if self.md5 is None:
+                self.md5 = file_md5(self.file_path, self.chunk_size)
+            if not self.matches(entry):
+                last_error = f"checksum mismatch: local md5:{self.md5}, bucket {entry.get('checksum')}"
+                continue
+            return entry
+
+        raise UploadError(f"Upload failed after {self.attempts} attempts: {last_error}")
+
+
+def file_md5(file_path, chunk_size=CHUNK_SIZE):
+    digest = hashlib.md5()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()